@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from sqlalchemy.exc import SQLAlchemyError
 
-from .queries.q_auth import add_admin, get_login
+from .queries.q_auth import add_admin, get_login, revoke_token
+from .utils.config import validate_jwt_token, decode_access_token, revocation_list
+from .utils.ratelimit import rate_limit, limiter, get_client_ip
 
 
 # Definisikan model Pydantic untuk validasi input
@@ -25,7 +27,7 @@ class LoginResponse(BaseModel):
     email: str
     role: str
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(rate_limit("auth"))])  # Rate limit per IP
 
 # @router.post("/auth/add-admin", tags=["Auth"])
 # async def create_admin(admin_request: AdminCreateRequest):
@@ -41,7 +43,7 @@ router = APIRouter()
 
 # Endpoint untuk login
 @router.post("/auth/login", response_model=LoginResponse, tags=["Auth"])
-async def login(login_request: LoginRequest):
+async def login(login_request: LoginRequest, request: Request):
     """Login menggunakan email + password"""
     # Ambil data dari request body
     payload = login_request.dict()
@@ -50,9 +52,15 @@ async def login(login_request: LoginRequest):
     if not payload.get('email') or not payload.get('password'):
         raise HTTPException(status_code=400, detail="Email and password are required")
 
+    # Batas login gagal per (akun, IP), melengkapi batas per IP pada router. Hanya login gagal yang
+    # dihitung dan IP ikut jadi key, agar pihak lain tidak bisa mengunci akun admin dari IP berbeda
+    account_key = f"{payload['email'].strip().lower()}|{get_client_ip(request)}"
+    await limiter.check("auth_account", account_key, consume=False)
+
     try:
         jwt_response = get_login(payload)
         if jwt_response is None:
+            await limiter.charge("auth_account", account_key)
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
         return {
@@ -64,4 +72,16 @@ async def login(login_request: LoginRequest):
             "role": jwt_response['role'],
         }
     except SQLAlchemyError as e:
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+# Endpoint untuk logout (mencabut token yang sedang dipakai)
+@router.post("/auth/logout", tags=["Auth"])
+async def logout(token: str = Depends(validate_jwt_token)):
+    """Logout: token dimasukkan ke daftar pencabutan sampai waktu kadaluarsanya"""
+    claims = decode_access_token(token)
+    revoked = revoke_token(claims['jti'], int(claims['sub']), claims['exp'])
+    if revoked is None:
+        raise HTTPException(status_code=500, detail="Internal server error")
+    revocation_list.add(claims['jti'], claims['exp'])  # Langsung berlaku di worker ini
+    return {"message": "Logged out successfully"}
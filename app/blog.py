@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from .utils.config import validate_jwt_token
+from .utils.cache import cache, set_stale_headers, NOT_FOUND
 from .queries.q_blog import *
+from .utils.ratelimit import rate_limit
+from .utils.views import view_counter
 
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(rate_limit("blog"))])  # Rate limit per IP
 
 class BlogResponse(BaseModel):
     id_blog: int
@@ -17,6 +21,15 @@ class BlogResponse(BaseModel):
     created_at: str
     updated_at: str
 
+# Pydantic model untuk request multi-get berdasarkan daftar ID
+class BlogBatchGetRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=100)
+
+# Pydantic model untuk response multi-get
+class BlogBatchGetResponse(BaseModel):
+    items: List[BlogResponse]
+    missing: List[int]  # ID yang tidak ditemukan atau sudah dihapus
+
 class BlogCreate(BaseModel):
     title: str
     content: str
@@ -31,9 +44,10 @@ class BlogUpdate(BaseModel):
 
 
 @router.get("/blog", response_model=List[BlogResponse], tags=["Blog"])
-async def get_blogs():
+async def get_blogs(response: Response):
     """Endpoint untuk menampilkan semua blog informasi"""
-    blogs = get_all_blogs()
+    blogs, stale_age = await cache.fetch("blog:list", lambda: run_in_threadpool(get_all_blogs))
+    set_stale_headers(response, stale_age)
     if blogs is None:
         raise HTTPException(status_code=500, detail="Internal Server Error")
     if not blogs:
@@ -41,13 +55,34 @@ async def get_blogs():
     return blogs
 
 @router.get("/blog/{id}", response_model=BlogResponse, tags=["Blog"])
-async def get_blog(id: int):
+async def get_blog(id: int, response: Response):
     """Endpoint untuk menampilkan detail blog berdasarkan ID"""
-    blog = get_blog_by_id(id)
-    if not blog:
+    blog, stale_age = await cache.fetch(
+        f"blog:{id}", lambda: run_in_threadpool(get_blog_by_id, id, missing=NOT_FOUND)
+    )
+    set_stale_headers(response, stale_age)
+    if blog is NOT_FOUND:
         raise HTTPException(status_code=404, detail="Blog not found")
+    if blog is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")  # Query gagal, bukan data tidak ada
+    view_counter.hit("blog", id)  # Hanya di memori, di-flush berkala
     return blog
 
+@router.post("/blog/batch-get", response_model=BlogBatchGetResponse, tags=["Blog"])
+async def batch_get_blog(batch_request: BlogBatchGetRequest):
+    """Endpoint untuk menampilkan banyak blog sekaligus berdasarkan daftar ID"""
+    # Memakai cache yang sama dengan endpoint detail, sisanya diambil dalam satu query
+    found = await run_in_threadpool(
+        cache.get_many, "blog:", batch_request.ids, get_blogs_by_ids, id_field="id_blog"
+    )
+    if found is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    ids = list(dict.fromkeys(batch_request.ids))
+    return {
+        "items": [found[id_] for id_ in ids if id_ in found],  # Urutan sesuai permintaan
+        "missing": [id_ for id_ in ids if id_ not in found],
+    }
+
 @router.post("/blog", response_model=BlogResponse, tags=["Blog"])
 async def create_blog(blog_create: BlogCreate, token: str = Depends(validate_jwt_token)):
     """Endpoint untuk menambah blog baru"""
@@ -59,6 +94,7 @@ async def create_blog(blog_create: BlogCreate, token: str = Depends(validate_jwt
     )
     if not new_blog:
         raise HTTPException(status_code=400, detail="Failed to add blog")
+    cache.invalidate("home:", "blog:list")  # Halaman utama dan list ikut berubah
     return new_blog
 
 @router.put("/blog/{id}", response_model=BlogResponse, tags=["Blog"])
@@ -73,6 +109,8 @@ async def update_blog_endpoint(id: int, blog_update: BlogUpdate, token: str = De
     )
     if not updated_blog:
         raise HTTPException(status_code=400, detail="Failed to update blog")
+    cache.invalidate("home:", "blog:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"blog:{id}")
     return updated_blog  # Mengembalikan blog yang sudah diperbarui
 
 @router.delete("/blog/{id}", tags=["Blog"])
@@ -82,4 +120,6 @@ async def delete_blog(id: int, token: str = Depends(validate_jwt_token)):
     deleted_blog = soft_delete_blog(blog_id=id)
     if not deleted_blog:
         raise HTTPException(status_code=400, detail="Failed to delete blog")
+    cache.invalidate("home:", "blog:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"blog:{id}")
     return {"message": f"Blog '{deleted_blog['title']}' deleted successfully"}
\ No newline at end of file
@@ -1,13 +1,25 @@
 # app/destinasi.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from .queries.q_destinasi import *
+from .queries.q_paket import get_all_paket
+from .paket import PaketResponse
 from .utils.config import validate_jwt_token
+from .utils.cache import cache, set_stale_headers, NOT_FOUND
+from .utils.ratelimit import rate_limit
+from .utils.views import view_counter
 
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(rate_limit("destinasi"))])  # Rate limit per IP
+
+def check_coordinate_pair(model):
+    """Latitude dan longitude harus dikirim berpasangan (keduanya atau tidak sama sekali)"""
+    if (model.latitude is None) != (model.longitude is None):
+        raise ValueError("latitude and longitude must be provided together")
+    return model
 
 # Pydantic model untuk validasi input data destinasi
 class DestinationCreate(BaseModel):
@@ -15,6 +27,10 @@ class DestinationCreate(BaseModel):
     description: str
     image_url: Optional[str] = None
     location_url: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)  # Jika kosong, diambil dari location_url
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    _check_coordinates = model_validator(mode="after")(check_coordinate_pair)
     
 # Pydantic model untuk response
 class DestinationResponse(BaseModel):
@@ -23,8 +39,23 @@ class DestinationResponse(BaseModel):
     description: str
     image_url: Optional[str] = None
     location_url: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: str
     updated_at: str
+
+# Pydantic model untuk response destinasi terdekat
+class NearbyDestinationResponse(DestinationResponse):
+    distance_km: float
+
+# Pydantic model untuk request multi-get berdasarkan daftar ID
+class DestinationBatchGetRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=100)
+
+# Pydantic model untuk response multi-get
+class DestinationBatchGetResponse(BaseModel):
+    items: List[DestinationResponse]
+    missing: List[int]  # ID yang tidak ditemukan atau sudah dihapus
     
 # Pydantic model untuk validasi update data destinasi
 class DestinationUpdate(BaseModel):
@@ -32,12 +63,19 @@ class DestinationUpdate(BaseModel):
     description: Optional[str] = None
     image_url: Optional[str] = None
     location_url: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)  # Jika kosong dan location_url diganti, diambil dari link baru
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    _check_coordinates = model_validator(mode="after")(check_coordinate_pair)
     
 
 @router.get("/destinasi", response_model=List[DestinationResponse], tags=["Destinasi"])
-async def get_destinations():
+async def get_destinations(response: Response):
     """Endpoint untuk menampilkan semua destinasi wisata"""
-    destinations = get_all_destinations()
+    destinations, stale_age = await cache.fetch(
+        "destinasi:list", lambda: run_in_threadpool(get_all_destinations)
+    )
+    set_stale_headers(response, stale_age)
     if destinations is None:
         raise HTTPException(status_code=500, detail="Internal Server Error")
     if not destinations:
@@ -45,15 +83,65 @@ async def get_destinations():
     return destinations
 
 
+# Didaftarkan sebelum /destinasi/{id} agar "nearby" tidak dibaca sebagai ID
+@router.get("/destinasi/nearby", response_model=List[NearbyDestinationResponse], tags=["Destinasi"])
+async def get_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(10, gt=0, le=200),  # Radius dalam kilometer
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Endpoint untuk menampilkan destinasi terdekat dari suatu titik, diurutkan berdasarkan jarak"""
+    destinations = await run_in_threadpool(get_nearby_destinations, lat, lon, radius, limit)
+    if destinations is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return destinations
+
+
 @router.get("/destinasi/{id}", response_model=DestinationResponse, tags=["Destinasi"])
-async def get_destination(id: int):
+async def get_destination(id: int, response: Response):
     """Endpoint untuk menampilkan detail destinasi berdasarkan ID"""
-    destination = get_destination_by_id(id)
-    if not destination:
+    destination, stale_age = await cache.fetch(
+        f"destinasi:{id}", lambda: run_in_threadpool(get_destination_by_id, id, missing=NOT_FOUND)
+    )
+    set_stale_headers(response, stale_age)
+    if destination is NOT_FOUND:
         raise HTTPException(status_code=404, detail="Destination not found")
+    if destination is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")  # Query gagal, bukan data tidak ada
+    view_counter.hit("destinasi", id)  # Hanya di memori, di-flush berkala
     return destination
 
 
+@router.get("/destinasi/{id}/paket", response_model=List[PaketResponse], tags=["Destinasi"])
+async def get_destination_packages(id: int):
+    """Endpoint untuk menampilkan semua paket yang memuat destinasi tertentu"""
+    destination = await run_in_threadpool(get_destination_by_id, id)
+    if not destination:
+        raise HTTPException(status_code=404, detail="Destination not found")
+    # Memakai GIN index pada packages.destinations (array containment)
+    paket = await run_in_threadpool(get_all_paket, destination_id=id)
+    if paket is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    return paket
+
+
+@router.post("/destinasi/batch-get", response_model=DestinationBatchGetResponse, tags=["Destinasi"])
+async def batch_get_destinasi(batch_request: DestinationBatchGetRequest):
+    """Endpoint untuk menampilkan banyak destinasi sekaligus berdasarkan daftar ID"""
+    # Memakai cache yang sama dengan endpoint detail, sisanya diambil dalam satu query
+    found = await run_in_threadpool(
+        cache.get_many, "destinasi:", batch_request.ids, get_destinations_by_ids, id_field="id_destination"
+    )
+    if found is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    ids = list(dict.fromkeys(batch_request.ids))
+    return {
+        "items": [found[id_] for id_ in ids if id_ in found],  # Urutan sesuai permintaan
+        "missing": [id_ for id_ in ids if id_ not in found],
+    }
+
+
 @router.post("/destinasi", response_model=DestinationResponse, tags=["Destinasi"])
 async def create_destination(destination: DestinationCreate, token: str = Depends(validate_jwt_token)):
     """Endpoint untuk menambah destinasi baru"""
@@ -61,10 +149,13 @@ async def create_destination(destination: DestinationCreate, token: str = Depend
         destination.name,
         destination.description,
         destination.image_url,
-        destination.location_url
+        destination.location_url,
+        destination.latitude,
+        destination.longitude
     )
     if not new_destination:
         raise HTTPException(status_code=400, detail="Failed to add destination")
+    cache.invalidate("home:", "destinasi:list")  # Halaman utama dan list ikut berubah
     return new_destination
 
 
@@ -76,10 +167,14 @@ async def update_destination_endpoint(id: int, destination_update: DestinationUp
         name=destination_update.name,
         description=destination_update.description,
         image_url=destination_update.image_url,
-        location_url=destination_update.location_url
+        location_url=destination_update.location_url,
+        latitude=destination_update.latitude,
+        longitude=destination_update.longitude
     )
     if not updated_destination:
         raise HTTPException(status_code=400, detail="Failed to update destination")
+    cache.invalidate("home:", "destinasi:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"destinasi:{id}")
     return updated_destination
 
 
@@ -90,4 +185,7 @@ async def delete_destination(id: int, token: str = Depends(validate_jwt_token)):
     deleted_destination = soft_delete_destination(id)
     if not deleted_destination:
         raise HTTPException(status_code=404, detail="Destination not found or already deleted")
+    cache.invalidate("home:", "destinasi:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"destinasi:{id}")
+    cache.invalidate("paket:")  # Destinasi juga dilepas dari paket terkait
     return {"message": f"Destination '{deleted_destination['name']}' deleted successfully"}
\ No newline at end of file
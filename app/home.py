@@ -0,0 +1,61 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from pydantic import BaseModel
+
+from .destinasi import DestinationResponse
+from .blog import BlogResponse
+from .queries.q_home import get_latest_destinations, get_featured_packages, get_recent_blogs
+from .utils.cache import cache, set_stale_headers
+from .utils.ratelimit import rate_limit
+
+
+router = APIRouter(dependencies=[Depends(rate_limit("home"))])  # Rate limit per IP
+
+# Pydantic model untuk ringkasan destinasi di dalam paket
+class DestinationSummary(BaseModel):
+    id_destination: int
+    name: str
+    image_url: Optional[str] = None
+    location_url: Optional[str] = None
+
+# Pydantic model untuk paket unggulan dengan destinasi yang sudah di-expand
+class FeaturedPaketResponse(BaseModel):
+    id_package: int
+    name: str
+    description: str
+    price: Optional[float] = None
+    destinations: List[DestinationSummary] = []
+    benefits: Optional[List[str]] = []
+    image_url: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+# Pydantic model untuk response halaman utama
+class HomeResponse(BaseModel):
+    destinations: List[DestinationResponse]
+    packages: List[FeaturedPaketResponse]
+    blogs: List[BlogResponse]
+
+
+@router.get("/home", response_model=HomeResponse, tags=["Home"])
+async def get_home(response: Response, limit: int = Query(6, ge=1, le=20)):
+    """Endpoint agregat halaman utama: destinasi terbaru, paket unggulan dan blog terbaru"""
+    async def load_home():
+        # Ketiga query dijalankan bersamaan di threadpool agar tidak memblokir event loop
+        destinations, packages, blogs = await asyncio.gather(
+            run_in_threadpool(get_latest_destinations, limit),
+            run_in_threadpool(get_featured_packages, limit),
+            run_in_threadpool(get_recent_blogs, limit),
+        )
+        if destinations is None or packages is None or blogs is None:
+            return None
+        return {"destinations": destinations, "packages": packages, "blogs": blogs}
+
+    # Disimpan di cache sebagai satu kesatuan
+    home, stale_age = await cache.fetch(f"home:{limit}", load_home)
+    if home is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    set_stale_headers(response, stale_age)
+    return home
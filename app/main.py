@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,6 +7,20 @@ from .auth import router as auth_router
 from .destinasi import router as destinasi_router
 from .paket import router as paket_router
 from .blog import router as blog_router
+from .home import router as home_router
+from .popular import router as popular_router
+from .sync import router as sync_router
+from .stream import router as stream_router
+from .monitoring import router as monitoring_router
+from .utils.events import broker, ChangeListener
+from .utils.admission import AdmissionControlMiddleware
+from .utils.log import setup_logging, stop_logging, RequestIdMiddleware
+from .utils.profiling import ProfilingMiddleware
+from .utils.timeouts import QueryTimeoutMiddleware
+from .utils.config import revocation_list, REVOCATION_SYNC_SECONDS
+from .queries.q_auth import get_revoked_tokens_since, get_disabled_user_ids, is_token_revoked
+from .queries.q_views import add_view_counts
+from .utils.views import view_counter
 
 
 # Metadata untuk tags
@@ -13,10 +29,37 @@ tags_metadata = [
     {"name": "Destinasi", "description": "Endpoint untuk manajemen destinasi wisata."},
     {"name": "Paket", "description": "Endpoint untuk manajemen paket wisata."},
     {"name": "Blog", "description": "Endpoint untuk mengelola blog informasi."},
+    {"name": "Home", "description": "Endpoint agregat untuk halaman utama."},
+    {"name": "Popular", "description": "Endpoint ranking konten terpopuler."},
+    {"name": "Sync", "description": "Endpoint delta sync untuk aplikasi offline."},
+    {"name": "Stream", "description": "Endpoint push perubahan data (SSE / WebSocket)."},
+    {"name": "Monitoring", "description": "Endpoint untuk metrics dan diagnostik internal."},
 ]
 
+# Startup dan shutdown worker
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging asinkron: penulisan log dilakukan thread terpisah
+    setup_logging()
+    # Satu listener LISTEN/NOTIFY per worker untuk stream perubahan
+    broker.bind(asyncio.get_running_loop())
+    change_listener = ChangeListener(broker)
+    change_listener.start()
+    # Sinkronisasi denylist token (logout dan user nonaktif) antar worker
+    revocation_list.start_sync(
+        get_revoked_tokens_since, get_disabled_user_ids, is_token_revoked, REVOCATION_SYNC_SECONDS
+    )
+    # Counter view di-flush berkala ke database
+    view_counter.start(add_view_counts)
+    yield
+    view_counter.stop()
+    change_listener.stop()
+    revocation_list.stop_sync()
+    stop_logging()
+
 # Inisialisasi FastAPI dengan tags metadata
 app = FastAPI(
+    lifespan=lifespan,
     title="Desa Wisata API",
     description="API untuk mengelola destinasi wisata dan paket wisata.",
     version="1.0.0",
@@ -24,6 +67,15 @@ app = FastAPI(
     swagger_ui_parameters={"docExpansion": "none"},
 )
 
+# Statement timeout per route dan pembatalan query saat client disconnect (504 jika timeout), middleware terdalam
+app.add_middleware(QueryTimeoutMiddleware)
+
+# Profiling on-demand untuk admin (?profile=1 atau header X-Profile: 1)
+app.add_middleware(ProfilingMiddleware)
+
+# Admission control per grup route (ditambahkan sebelum CORS agar response 503 tetap membawa header CORS)
+app.add_middleware(AdmissionControlMiddleware)
+
 # Konfigurasi CORS
 app.add_middleware(
     CORSMiddleware,
@@ -33,11 +85,19 @@ app.add_middleware(
     allow_headers=["*"],  # Mengizinkan semua headers
 )
 
+# Request ID dan access log (middleware terluar agar semua response tercatat)
+app.add_middleware(RequestIdMiddleware)
+
 # Mendaftarkan router dari auth.py
 app.include_router(auth_router)
 app.include_router(destinasi_router)
 app.include_router(paket_router)
 app.include_router(blog_router)
+app.include_router(home_router)
+app.include_router(popular_router)
+app.include_router(sync_router)
+app.include_router(stream_router)
+app.include_router(monitoring_router)
 
 # @app.get("/")
 # def read_root():
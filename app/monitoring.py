@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Literal
+
+from .utils.config import validate_jwt_token
+from .utils.metrics import metrics
+from .utils.profiling import profile_store
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["Monitoring"])
+async def get_metrics(token: str = Depends(validate_jwt_token)):
+    """Endpoint untuk menampilkan metrics internal worker ini (counter dan gauge)"""
+    return metrics.snapshot()
+
+
+@router.get("/profiles/{profile_id}", tags=["Monitoring"])
+async def get_profile(profile_id: str, format: Literal["json", "folded"] = "json",
+                      token: str = Depends(validate_jwt_token)):
+    """Endpoint untuk menampilkan hasil profil request (ID dari header X-Profile-Id)
+
+    format=folded mengembalikan stack terlipat untuk flame graph (flamegraph.pl / speedscope).
+    """
+    session = profile_store.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(session.folded())
+    return session.summary()
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 
 from .utils.config import validate_jwt_token
+from .utils.cache import cache, set_stale_headers, NOT_FOUND
 from .queries.q_paket import *
+from .queries.q_destinasi import get_invalid_destination_ids
+from .utils.ratelimit import rate_limit
+from .utils.views import view_counter
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(rate_limit("paket"))])  # Rate limit per IP
 
 # Pydantic model untuk response paket wisata
 class PaketResponse(BaseModel):
@@ -19,6 +24,16 @@ class PaketResponse(BaseModel):
     created_at: str
     updated_at: str
     
+
+# Pydantic model untuk request multi-get berdasarkan daftar ID
+class PaketBatchGetRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=100)
+
+# Pydantic model untuk response multi-get
+class PaketBatchGetResponse(BaseModel):
+    items: List[PaketResponse]
+    missing: List[int]  # ID yang tidak ditemukan atau sudah dihapus
+
 # Pydantic model untuk validasi input data paket wisata
 class PaketCreate(BaseModel):
     name: str
@@ -38,10 +53,39 @@ class PackageUpdate(BaseModel):
     image_url: Optional[str] = None
 
 
+def validate_destinations(destinations: Optional[List[int]]):
+    """Memastikan semua ID destinasi ada dan aktif (satu round trip ke database)"""
+    if not destinations:
+        return
+    invalid_ids = get_invalid_destination_ids(destinations)
+    if invalid_ids is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    if invalid_ids:
+        raise HTTPException(status_code=400, detail=f"Invalid destination IDs: {invalid_ids}")
+
+
 @router.get("/paket", response_model=List[PaketResponse], tags=["Paket"])
-async def get_paket():
-    """Endpoint untuk menampilkan semua paket wisata"""
-    paket = get_all_paket()
+async def get_paket(
+    response: Response,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    destination_id: Optional[int] = None,
+    sort: Literal["price", "created_at"] = "created_at",
+    order: Optional[Literal["asc", "desc"]] = None,
+):
+    """Endpoint untuk menampilkan semua paket wisata, bisa difilter berdasarkan harga dan destinasi"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not be greater than max_price")
+    cache_key = f"paket:list:{min_price}:{max_price}:{destination_id}:{sort}:{order}"
+    paket, stale_age = await cache.fetch(cache_key, lambda: run_in_threadpool(
+        get_all_paket,
+        min_price=min_price,
+        max_price=max_price,
+        destination_id=destination_id,
+        sort=sort,
+        order=order
+    ))
+    set_stale_headers(response, stale_age)
     if paket is None:
         raise HTTPException(status_code=500, detail="Internal Server Error")
     if not paket:
@@ -49,16 +93,38 @@ async def get_paket():
     return paket
 
 @router.get("/paket/{id}", response_model=PaketResponse, tags=["Paket"])
-async def get_package(id: int):
+async def get_package(id: int, response: Response):
     """Endpoint untuk menampilkan detail paket berdasarkan ID"""
-    paket = get_package_by_id(id)
-    if paket is None:
+    paket, stale_age = await cache.fetch(
+        f"paket:{id}", lambda: run_in_threadpool(get_package_by_id, id, missing=NOT_FOUND)
+    )
+    set_stale_headers(response, stale_age)
+    if paket is NOT_FOUND:
         raise HTTPException(status_code=404, detail="Package not found")
+    if paket is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")  # Query gagal, bukan data tidak ada
+    view_counter.hit("paket", id)  # Hanya di memori, di-flush berkala
     return paket
 
+@router.post("/paket/batch-get", response_model=PaketBatchGetResponse, tags=["Paket"])
+async def batch_get_paket(batch_request: PaketBatchGetRequest):
+    """Endpoint untuk menampilkan banyak paket wisata sekaligus berdasarkan daftar ID"""
+    # Memakai cache yang sama dengan endpoint detail, sisanya diambil dalam satu query
+    found = await run_in_threadpool(
+        cache.get_many, "paket:", batch_request.ids, get_packages_by_ids, id_field="id_package"
+    )
+    if found is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    ids = list(dict.fromkeys(batch_request.ids))
+    return {
+        "items": [found[id_] for id_ in ids if id_ in found],  # Urutan sesuai permintaan
+        "missing": [id_ for id_ in ids if id_ not in found],
+    }
+
 @router.post("/paket", response_model=PaketResponse, tags=["Paket"])
 async def create_package(paket_create: PaketCreate, token: str = Depends(validate_jwt_token)):
     """Endpoint untuk menambah paket wisata baru"""
+    validate_destinations(paket_create.destinations)
     # Panggil fungsi query untuk menambah paket wisata
     new_package = add_package(
         paket_create.name,
@@ -70,11 +136,13 @@ async def create_package(paket_create: PaketCreate, token: str = Depends(validat
     )
     if not new_package:
         raise HTTPException(status_code=400, detail="Failed to add package")
+    cache.invalidate("home:", "paket:list")  # Halaman utama dan list ikut berubah
     return new_package  # Mengembalikan paket wisata yang baru ditambahkan
 
 @router.put("/paket/{id}", response_model=PaketResponse, tags=["Paket"])
 async def update_package_endpoint(id: int, package_update: PackageUpdate, token: str = Depends(validate_jwt_token)):
     """Endpoint untuk mengedit paket wisata berdasarkan ID"""
+    validate_destinations(package_update.destinations)
     updated_package = update_package(
         package_id=id,
         name=package_update.name,
@@ -86,6 +154,8 @@ async def update_package_endpoint(id: int, package_update: PackageUpdate, token:
     )
     if not updated_package:
         raise HTTPException(status_code=400, detail="Failed to update package")
+    cache.invalidate("home:", "paket:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"paket:{id}")
     return updated_package  # Mengembalikan paket yang sudah diperbarui
 
 @router.delete("/paket/{id}", tags=["Paket"])
@@ -95,4 +165,6 @@ async def delete_package(id: int, token: str = Depends(validate_jwt_token)):
     deleted_package = soft_delete_package(package_id=id)
     if not deleted_package:
         raise HTTPException(status_code=400, detail="Failed to delete package")
+    cache.invalidate("home:", "paket:list")  # Halaman utama dan list ikut berubah
+    cache.delete(f"paket:{id}")
     return {"message": f"Paket '{deleted_package['name']}' deleted successfully"}
\ No newline at end of file
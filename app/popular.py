@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+
+from .queries.q_views import get_popular
+from .utils.cache import cache, set_stale_headers
+from .utils.config import POPULAR_CACHE_SECONDS
+from .utils.ratelimit import rate_limit
+
+
+router = APIRouter(dependencies=[Depends(rate_limit("popular"))])  # Rate limit per IP
+
+# Rentang waktu ranking dalam hari
+POPULAR_WINDOWS = {"1d": 1, "7d": 7, "30d": 30}
+
+# Pydantic model untuk item ranking
+class PopularItem(BaseModel):
+    id: int
+    title: str
+    image_url: Optional[str] = None
+    views: int
+
+
+@router.get("/popular", response_model=List[PopularItem], tags=["Popular"])
+async def get_popular_items(
+    response: Response,
+    entity: Literal["destinasi", "paket", "blog"] = "destinasi",
+    window: Literal["1d", "7d", "30d"] = "7d",
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Endpoint untuk menampilkan destinasi, paket atau blog terpopuler berdasarkan jumlah view"""
+    # Ranking dihitung dari tabel view_counts lalu disimpan di cache
+    popular, stale_age = await cache.fetch(
+        f"popular:{entity}:{window}:{limit}",
+        lambda: run_in_threadpool(get_popular, entity, POPULAR_WINDOWS[window], limit),
+        ttl=POPULAR_CACHE_SECONDS,
+    )
+    if popular is None:
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+    set_stale_headers(response, stale_age)
+    return popular
@@ -1,9 +1,12 @@
+import logging
 from sqlalchemy import text
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.config import get_connection, create_access_token
 
+logger = logging.getLogger(__name__)
+
 
 def add_admin(username, email, password):
     conn = get_connection()  # Membuka koneksi ke database
@@ -40,7 +43,7 @@ def add_admin(username, email, password):
             return None
     except SQLAlchemyError as e:
         # Menangani error jika terjadi masalah pada query
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
 
 # Fungsi login yang akan memverifikasi email dan password
@@ -76,5 +79,71 @@ def get_login(payload):
                     }
             return None
     except SQLAlchemyError as e:
-        print(f"Error occurred: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def revoke_token(jti: str, id_user: int, expires_at: int):
+    """Fungsi untuk mencatat token yang dicabut (logout)"""
+    conn = get_connection()
+    try:
+        with conn.begin() as connection:
+            result = connection.execute(
+                text("""
+                    INSERT INTO revoked_tokens (jti, id_user, expires_at, revoked_at)
+                    VALUES (:jti, :id_user, to_timestamp(:expires_at), NOW())
+                    ON CONFLICT (jti) DO NOTHING
+                    RETURNING jti;
+                """),
+                {"jti": jti, "id_user": id_user, "expires_at": expires_at}
+            ).fetchone()
+            return {"jti": jti, "already_revoked": result is None}
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def get_revoked_tokens_since(since=None):
+    """Fungsi untuk mengambil token dicabut yang belum kadaluarsa (inkremental berdasarkan revoked_at)"""
+    conn = get_connection()
+    try:
+        with conn.connect() as connection:
+            result = connection.execute(
+                text("""
+                    SELECT jti, expires_at, revoked_at
+                    FROM revoked_tokens
+                    WHERE expires_at > NOW()
+                      AND (CAST(:since AS TIMESTAMPTZ) IS NULL OR revoked_at >= :since)
+                    ORDER BY revoked_at;
+                """),
+                {"since": since}
+            ).fetchall()
+            return [(row[0], row[1], row[2]) for row in result]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def is_token_revoked(jti: str):
+    """Fungsi untuk memastikan jti benar-benar dicabut (konfirmasi hasil positif Bloom filter)"""
+    conn = get_connection()
+    try:
+        with conn.connect() as connection:
+            result = connection.execute(
+                text("SELECT 1 FROM revoked_tokens WHERE jti = :jti LIMIT 1;"),
+                {"jti": jti}
+            ).fetchone()
+            return result is not None
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def get_disabled_user_ids():
+    """Fungsi untuk mengambil ID user yang dinonaktifkan (status = 0), token mereka dianggap dicabut"""
+    conn = get_connection()
+    try:
+        with conn.connect() as connection:
+            result = connection.execute(
+                text("SELECT id_user FROM users WHERE status = 0;")
+            ).fetchall()
+            return [row[0] for row in result]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
@@ -1,10 +1,16 @@
+import logging
 from typing import Optional
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.config import get_connection
+from ..utils.events import notify_change
+from ..utils.singleflight import single_flight
 
+logger = logging.getLogger(__name__)
 
+
+@single_flight
 def get_all_blogs():
     """Fungsi untuk mengambil semua blog dengan status aktif"""
     conn = get_connection()  # Membuka koneksi ke database
@@ -34,10 +40,11 @@ def get_all_blogs():
                 ]
             return []
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
 
-def get_blog_by_id(blog_id: int):
+@single_flight
+def get_blog_by_id(blog_id: int, missing=None):
     conn = get_connection()
     try:
         with conn.connect() as connection:
@@ -60,9 +67,9 @@ def get_blog_by_id(blog_id: int):
                     "created_at": str(result["created_at"]),
                     "updated_at": str(result["updated_at"]),
                 }
-            return None
+            return missing  # Blog tidak ditemukan (berbeda dari error yang mengembalikan None)
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def add_blog(title: str, content: str, image_url: Optional[str], post_url: Optional[str]):
@@ -84,6 +91,7 @@ def add_blog(title: str, content: str, image_url: Optional[str], post_url: Optio
             }).fetchone()
 
             if result:
+                notify_change(connection, "blog", result[0], "create")  # Terkirim setelah commit
                 return {
                     "id_blog": result[0],
                     "title": result[1],
@@ -95,7 +103,7 @@ def add_blog(title: str, content: str, image_url: Optional[str], post_url: Optio
                 }
             return None
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def update_blog(blog_id: int, title: str, content: str, image_url: Optional[str], post_url: Optional[str]):
@@ -123,6 +131,7 @@ def update_blog(blog_id: int, title: str, content: str, image_url: Optional[str]
             }).fetchone()  # Mengambil hasil satu baris hasil eksekusi query
 
             if result:
+                notify_change(connection, "blog", result[0], "update")  # Terkirim setelah commit
                 # Mengembalikan hasil dalam bentuk dictionary
                 return {
                     "id_blog": result[0],
@@ -135,7 +144,7 @@ def update_blog(blog_id: int, title: str, content: str, image_url: Optional[str]
                 }
             return None  # Jika gagal
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def soft_delete_blog(blog_id: int):
@@ -154,6 +163,7 @@ def soft_delete_blog(blog_id: int):
             result = connection.execute(query, {"id_blog": blog_id}).mappings().fetchone()
 
             if result:
+                notify_change(connection, "blog", result["id_blog"], "delete")  # Terkirim setelah commit
                 # Mengembalikan hasil query dalam bentuk dictionary
                 return {
                     "id_blog": result["id_blog"],
@@ -161,5 +171,36 @@ def soft_delete_blog(blog_id: int):
                 }
             return None  # Jika gagal melakukan soft delete
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_blogs_by_ids(ids: list):
+    """Fungsi untuk mengambil banyak blog sekaligus berdasarkan daftar ID (satu query)"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_blog, title, content, image_url, post_url, created_at, updated_at
+                FROM blogs
+                WHERE id_blog = ANY(:ids) AND status = 1;
+            """)
+
+            result = connection.execute(query, {"ids": list(ids)}).mappings().fetchall()
+
+            # Urutan hasil diatur ulang oleh router sesuai urutan ID yang diminta
+            return [
+                {
+                    "id_blog": row["id_blog"],
+                    "title": row["title"],
+                    "content": row["content"],
+                    "image_url": row["image_url"],
+                    "post_url": row["post_url"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
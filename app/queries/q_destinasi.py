@@ -1,17 +1,43 @@
+import logging
+import math
+import re
 from typing import Optional
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..utils.config import get_connection
+from ..utils.config import get_connection, CHANGES_CHANNEL
+from ..utils.events import notify_change
+from ..utils.singleflight import single_flight
 
+logger = logging.getLogger(__name__)
 
+
+# Pola koordinat pada link peta, contoh: .../@-8.2651,116.3921,15z  ?q=-8.2651,116.3921  !3d-8.2651!4d116.3921
+COORDINATE_PATTERNS = [
+    re.compile(r"!3d(-?\d{1,2}(?:\.\d+)?)!4d(-?\d{1,3}(?:\.\d+)?)"),
+    re.compile(r"(?:@|[?&](?:q|ll|query|destination|center)=)(-?\d{1,2}(?:\.\d+)?)(?:,|%2C)\s*(-?\d{1,3}(?:\.\d+)?)"),
+]
+
+def parse_coordinates(location_url: Optional[str]):
+    """Fungsi untuk mengambil (latitude, longitude) dari link peta, (None, None) jika tidak ada"""
+    if not location_url:
+        return None, None
+    for pattern in COORDINATE_PATTERNS:
+        match = pattern.search(location_url)
+        if match:
+            latitude, longitude = float(match.group(1)), float(match.group(2))
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                return latitude, longitude
+    return None, None
+
+@single_flight
 def get_all_destinations():
     conn = get_connection()  # Membuka koneksi ke database
     try:
         with conn.connect() as connection:
             # Query untuk mengambil semua destinasi yang status = 1 (aktif)
             query = text("""
-                SELECT id_destination, name, description, image_url, location_url, created_at, updated_at
+                SELECT id_destination, name, description, image_url, location_url, latitude, longitude, created_at, updated_at
                 FROM destinations
                 WHERE status = 1
                 ORDER BY created_at DESC;
@@ -28,6 +54,8 @@ def get_all_destinations():
                         "description": row["description"],
                         "image_url": row["image_url"],
                         "location_url": row["location_url"],
+                        "latitude": row["latitude"],
+                        "longitude": row["longitude"],
                         "created_at": str(row["created_at"]),
                         "updated_at": str(row["updated_at"]),
                     }
@@ -35,16 +63,17 @@ def get_all_destinations():
                 ]
             return []  # Mengembalikan list kosong jika tidak ada destinasi
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
 
-def get_destination_by_id(destination_id: int):
+@single_flight
+def get_destination_by_id(destination_id: int, missing=None):
     conn = get_connection()  # Membuka koneksi ke database
     try:
         with conn.connect() as connection:
             # Query untuk mengambil destinasi berdasarkan ID
             query = text("""
-                SELECT id_destination, name, description, image_url, location_url, created_at, updated_at
+                SELECT id_destination, name, description, image_url, location_url, latitude, longitude, created_at, updated_at
                 FROM destinations
                 WHERE id_destination = :id_destination AND status = 1
                 LIMIT 1;
@@ -60,32 +89,40 @@ def get_destination_by_id(destination_id: int):
                     "description": result["description"],
                     "image_url": result["image_url"],
                     "location_url": result["location_url"],
+                    "latitude": result["latitude"],
+                    "longitude": result["longitude"],
                     "created_at": str(result["created_at"]),
                     "updated_at": str(result["updated_at"]),
                 }
-            return None  # Jika destinasi tidak ditemukan
+            return missing  # Jika destinasi tidak ditemukan (berbeda dari error yang mengembalikan None)
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
-def add_destination(name: str, description: str, image_url: str, location_url: str):
+def add_destination(name: str, description: str, image_url: str, location_url: str,
+                    latitude: Optional[float] = None, longitude: Optional[float] = None):
     conn = get_connection()  # Membuka koneksi ke database
+    if latitude is None or longitude is None:
+        latitude, longitude = parse_coordinates(location_url)  # Koordinat diambil dari link peta jika ada
     try:
         with conn.begin() as connection:  # Memulai transaksi untuk operasi yang memerlukan commit
             query = text("""
-                INSERT INTO destinations (name, description, image_url, location_url, status, created_at, updated_at)
-                VALUES (:name, :description, :image_url, :location_url, 1, NOW(), NOW())
-                RETURNING id_destination, name, description, image_url, location_url, created_at, updated_at;
+                INSERT INTO destinations (name, description, image_url, location_url, latitude, longitude, status, created_at, updated_at)
+                VALUES (:name, :description, :image_url, :location_url, :latitude, :longitude, 1, NOW(), NOW())
+                RETURNING id_destination, name, description, image_url, location_url, created_at, updated_at, latitude, longitude;
             """)
             
             result = connection.execute(query, {
                 "name": name,
                 "description": description,
                 "image_url": image_url,
-                "location_url": location_url
+                "location_url": location_url,
+                "latitude": latitude,
+                "longitude": longitude
             }).fetchone()
 
             if result:
+                notify_change(connection, "destinasi", result[0], "create")  # Terkirim setelah commit
                 return {
                     "id_destination": result[0],
                     "name": result[1],
@@ -94,14 +131,23 @@ def add_destination(name: str, description: str, image_url: str, location_url: s
                     "location_url": result[4],
                     "created_at": str(result[5]),
                     "updated_at": str(result[6]),
+                    "latitude": result[7],
+                    "longitude": result[8],
                 }
             return None
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
-def update_destination(destination_id: int, name: Optional[str], description: Optional[str], image_url: Optional[str], location_url: Optional[str]):
+def update_destination(destination_id: int, name: Optional[str], description: Optional[str], image_url: Optional[str], location_url: Optional[str],
+                       latitude: Optional[float] = None, longitude: Optional[float] = None):
     conn = get_connection()  # Membuka koneksi ke database
+    # Koordinat diganti jika dikirim eksplisit, atau jika link peta diganti (NULL jika link baru tanpa koordinat)
+    # agar destinasi tidak tetap muncul di posisi lama pada /destinasi/nearby
+    set_coordinates = latitude is not None and longitude is not None
+    if not set_coordinates and location_url is not None:
+        latitude, longitude = parse_coordinates(location_url)
+        set_coordinates = True
     try:
         with conn.begin() as connection:
             query = text("""
@@ -110,9 +156,11 @@ def update_destination(destination_id: int, name: Optional[str], description: Op
                     description = COALESCE(:description, description),
                     image_url = COALESCE(:image_url, image_url),
                     location_url = COALESCE(:location_url, location_url),
+                    latitude = CASE WHEN :set_coordinates THEN :latitude ELSE latitude END,
+                    longitude = CASE WHEN :set_coordinates THEN :longitude ELSE longitude END,
                     updated_at = NOW()
                 WHERE id_destination = :id_destination
-                RETURNING id_destination, name, description, image_url, location_url, created_at, updated_at;
+                RETURNING id_destination, name, description, image_url, location_url, created_at, updated_at, latitude, longitude;
             """)
 
             result = connection.execute(query, {
@@ -120,10 +168,14 @@ def update_destination(destination_id: int, name: Optional[str], description: Op
                 "name": name,
                 "description": description,
                 "image_url": image_url,
-                "location_url": location_url
+                "location_url": location_url,
+                "latitude": latitude,
+                "longitude": longitude,
+                "set_coordinates": set_coordinates
             }).fetchone()
 
             if result:
+                notify_change(connection, "destinasi", result[0], "update")  # Terkirim setelah commit
                 return {
                     "id_destination": result[0],
                     "name": result[1],
@@ -132,10 +184,12 @@ def update_destination(destination_id: int, name: Optional[str], description: Op
                     "location_url": result[4],
                     "created_at": str(result[5]),
                     "updated_at": str(result[6]),
+                    "latitude": result[7],
+                    "longitude": result[8],
                 }
             return None
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def soft_delete_destination(destination_id: int):
@@ -153,6 +207,21 @@ def soft_delete_destination(destination_id: int):
             result = connection.execute(query, {"id_destination": destination_id}).fetchone()
 
             if result:
+                notify_change(connection, "destinasi", result[0], "delete")  # Terkirim setelah commit
+                # Lepaskan destinasi dari semua paket terkait dalam satu statement (set-based),
+                # paket yang berubah ikut dikirim sebagai event update
+                connection.execute(text("""
+                    WITH updated AS (
+                        UPDATE packages
+                        SET destinations = array_remove(destinations, :id_destination),
+                            updated_at = NOW()
+                        WHERE destinations @> ARRAY[:id_destination]::integer[]
+                        RETURNING id_package
+                    )
+                    SELECT pg_notify(:channel, json_build_object('entity', 'paket', 'id', id_package, 'action', 'update')::text)
+                    FROM updated;
+                """), {"id_destination": destination_id, "channel": CHANGES_CHANNEL})
+
                 # Mengembalikan data destinasi yang diupdate
                 return {
                     "id_destination": result[0],
@@ -160,5 +229,116 @@ def soft_delete_destination(destination_id: int):
                 }
             return None  # Jika destinasi tidak ditemukan atau gagal
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def get_invalid_destination_ids(destination_ids: list):
+    """Fungsi untuk mencari ID destinasi yang tidak ada atau sudah dihapus (validasi dalam satu query)"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_destination
+                FROM destinations
+                WHERE id_destination = ANY(:ids) AND status = 1;
+            """)
+
+            result = connection.execute(query, {"ids": list(set(destination_ids))}).fetchall()
+
+            valid_ids = {row[0] for row in result}
+            # Mengembalikan ID yang tidak valid dengan urutan sesuai input
+            return [id_ for id_ in dict.fromkeys(destination_ids) if id_ not in valid_ids]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_destinations_by_ids(ids: list):
+    """Fungsi untuk mengambil banyak destinasi sekaligus berdasarkan daftar ID (satu query)"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_destination, name, description, image_url, location_url, latitude, longitude, created_at, updated_at
+                FROM destinations
+                WHERE id_destination = ANY(:ids) AND status = 1;
+            """)
+
+            result = connection.execute(query, {"ids": list(ids)}).mappings().fetchall()
+
+            # Urutan hasil diatur ulang oleh router sesuai urutan ID yang diminta
+            return [
+                {
+                    "id_destination": row["id_destination"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "image_url": row["image_url"],
+                    "location_url": row["location_url"],
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_nearby_destinations(latitude: float, longitude: float, radius_km: float, limit: int):
+    """Fungsi untuk mengambil destinasi aktif dalam radius tertentu, diurutkan dari yang terdekat"""
+    # Bounding box kasar untuk GiST index, jarak sebenarnya dihitung dengan rumus haversine
+    lat_delta = radius_km / 111.32
+    lon_delta = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT *
+                FROM (
+                    SELECT id_destination, name, description, image_url, location_url, latitude, longitude,
+                           created_at, updated_at,
+                           6371 * 2 * asin(LEAST(1.0, sqrt(
+                               power(sin(radians(latitude - :latitude) / 2), 2)
+                               + cos(radians(:latitude)) * cos(radians(latitude))
+                                 * power(sin(radians(longitude - :longitude) / 2), 2)
+                           ))) AS distance_km
+                    FROM destinations
+                    WHERE status = 1
+                      AND point(longitude, latitude) <@ box(point(:min_lon, :min_lat), point(:max_lon, :max_lat))
+                ) nearby
+                WHERE distance_km <= :radius_km
+                ORDER BY distance_km
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {
+                "latitude": latitude,
+                "longitude": longitude,
+                "min_lat": latitude - lat_delta,
+                "max_lat": latitude + lat_delta,
+                "min_lon": longitude - lon_delta,
+                "max_lon": longitude + lon_delta,
+                "radius_km": radius_km,
+                "limit": limit
+            }).mappings().fetchall()
+
+            return [
+                {
+                    "id_destination": row["id_destination"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "image_url": row["image_url"],
+                    "location_url": row["location_url"],
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                    "distance_km": round(row["distance_km"], 3),
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
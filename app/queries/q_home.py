@@ -0,0 +1,126 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection
+from ..utils.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+@single_flight
+def get_latest_destinations(limit: int):
+    """Fungsi untuk mengambil N destinasi aktif terbaru"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_destination, name, description, image_url, location_url, latitude, longitude, created_at, updated_at
+                FROM destinations
+                WHERE status = 1
+                ORDER BY created_at DESC
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {"limit": limit}).mappings().fetchall()
+
+            return [
+                {
+                    "id_destination": row["id_destination"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "image_url": row["image_url"],
+                    "location_url": row["location_url"],
+                    "latitude": row["latitude"],
+                    "longitude": row["longitude"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_featured_packages(limit: int):
+    """Fungsi untuk mengambil N paket aktif terbaru beserta detail destinasinya"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            # Detail destinasi digabung dalam satu query (LATERAL) agar tidak terjadi N+1 query
+            query = text("""
+                SELECT p.id_package, p.name, p.description, p.price, p.benefits, p.image_url,
+                       p.created_at, p.updated_at,
+                       COALESCE(d.items, '[]'::json) AS destinations
+                FROM packages p
+                LEFT JOIN LATERAL (
+                    SELECT json_agg(
+                               json_build_object(
+                                   'id_destination', dst.id_destination,
+                                   'name', dst.name,
+                                   'image_url', dst.image_url,
+                                   'location_url', dst.location_url
+                               )
+                               ORDER BY array_position(p.destinations, dst.id_destination)
+                           ) AS items
+                    FROM destinations dst
+                    WHERE dst.id_destination = ANY(p.destinations)
+                      AND dst.status = 1
+                ) d ON TRUE
+                WHERE p.status = 1
+                ORDER BY p.created_at DESC
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {"limit": limit}).mappings().fetchall()
+
+            return [
+                {
+                    "id_package": row["id_package"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "price": row["price"],
+                    "destinations": row["destinations"],  # List detail destinasi
+                    "benefits": row["benefits"],
+                    "image_url": row["image_url"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_recent_blogs(limit: int):
+    """Fungsi untuk mengambil N blog aktif terbaru"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_blog, title, content, image_url, post_url, created_at, updated_at
+                FROM blogs
+                WHERE status = 1
+                ORDER BY created_at DESC
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {"limit": limit}).mappings().fetchall()
+
+            return [
+                {
+                    "id_blog": row["id_blog"],
+                    "title": row["title"],
+                    "content": row["content"],
+                    "image_url": row["image_url"],
+                    "post_url": row["post_url"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
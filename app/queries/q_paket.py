@@ -1,23 +1,54 @@
+import logging
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.config import get_connection
+from ..utils.events import notify_change
+from ..utils.singleflight import single_flight
 
+logger = logging.getLogger(__name__)
 
-def get_all_paket():
-    """Fungsi untuk mengambil semua paket wisata yang aktif"""
+
+# Kolom yang boleh dipakai untuk sorting (whitelist agar aman dari SQL injection)
+PAKET_SORT_COLUMNS = {
+    "price": "price",
+    "created_at": "created_at",
+}
+
+@single_flight
+def get_all_paket(min_price: float = None, max_price: float = None, destination_id: int = None,
+                  sort: str = "created_at", order: str = None):
+    """Fungsi untuk mengambil semua paket wisata yang aktif, dengan filter dan sorting opsional"""
     conn = get_connection()  # Membuka koneksi ke database
     try:
         with conn.connect() as connection:
-            # Query untuk mengambil semua paket wisata yang status = 1 (aktif)
-            query = text("""
+            # Semua filter dijalankan di SQL agar memakai index (lihat migrations/001)
+            conditions = ["status = 1"]
+            params = {}
+            if min_price is not None:
+                conditions.append("price >= :min_price")
+                params["min_price"] = min_price
+            if max_price is not None:
+                conditions.append("price <= :max_price")
+                params["max_price"] = max_price
+            if destination_id is not None:
+                # Array containment (@>) dapat memakai GIN index pada packages.destinations
+                conditions.append("destinations @> ARRAY[:destination_id]::integer[]")
+                params["destination_id"] = destination_id
+
+            sort_column = PAKET_SORT_COLUMNS.get(sort, "created_at")
+            if order not in ("asc", "desc"):
+                order = "asc" if sort_column == "price" else "desc"  # Default: termurah / terbaru
+
+            # Urutan default (price ASC / created_at DESC, NULLS LAST, id_package DESC) sama dengan index di migrations/001
+            query = text(f"""
                 SELECT id_package, name, description, price, destinations, benefits, image_url, created_at, updated_at
                 FROM packages
-                WHERE status = 1
-                ORDER BY created_at DESC;
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {sort_column} {order.upper()} NULLS LAST, id_package DESC;
             """)
 
-            result = connection.execute(query).mappings().fetchall()
+            result = connection.execute(query, params).mappings().fetchall()
 
             if result:
                 # Mengembalikan data paket wisata dalam bentuk list of dictionaries
@@ -37,10 +68,11 @@ def get_all_paket():
                 ]
             return []  # Mengembalikan list kosong jika tidak ada paket wisata
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
 
-def get_package_by_id(package_id: int):
+@single_flight
+def get_package_by_id(package_id: int, missing=None):
     """Fungsi untuk mengambil paket wisata berdasarkan ID"""
     conn = get_connection()  # Membuka koneksi ke database
     try:
@@ -68,9 +100,9 @@ def get_package_by_id(package_id: int):
                     "created_at": str(result["created_at"]),
                     "updated_at": str(result["updated_at"]),
                 }
-            return None  # Jika paket tidak ditemukan
+            return missing  # Jika paket tidak ditemukan (berbeda dari error yang mengembalikan None)
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def add_package(name: str, description: str, price: float, destinations: list, benefits: list, image_url: str):
@@ -95,6 +127,7 @@ def add_package(name: str, description: str, price: float, destinations: list, b
             }).mappings().fetchone()  # Mengambil hasil satu baris hasil eksekusi query
 
             if result:
+                notify_change(connection, "paket", result["id_package"], "create")  # Terkirim setelah commit
                 # Mengakses hasil menggunakan nama kolom
                 return {
                     "id_package": result["id_package"],
@@ -109,7 +142,7 @@ def add_package(name: str, description: str, price: float, destinations: list, b
                 }
             return None  # Jika gagal menambah paket
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def update_package(package_id: int, name: str, description: str, price: float, destinations: list, benefits: list, image_url: str):
@@ -142,6 +175,7 @@ def update_package(package_id: int, name: str, description: str, price: float, d
             }).mappings().fetchone()  # Mengambil hasil satu baris hasil eksekusi query
 
             if result:
+                notify_change(connection, "paket", result["id_package"], "update")  # Terkirim setelah commit
                 # Mengembalikan hasil query dalam bentuk dictionary
                 return {
                     "id_package": result["id_package"],
@@ -156,7 +190,7 @@ def update_package(package_id: int, name: str, description: str, price: float, d
                 }
             return None  # Jika gagal mengupdate paket
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
+        logger.error("Database error occurred: %s", e)
         return None
     
 def soft_delete_package(package_id: int):
@@ -175,6 +209,7 @@ def soft_delete_package(package_id: int):
             result = connection.execute(query, {"id_package": package_id}).mappings().fetchone()
 
             if result:
+                notify_change(connection, "paket", result["id_package"], "delete")  # Terkirim setelah commit
                 # Mengembalikan hasil query dalam bentuk dictionary
                 return {
                     "id_package": result["id_package"],
@@ -182,5 +217,38 @@ def soft_delete_package(package_id: int):
                 }
             return None  # Jika gagal melakukan soft delete
     except SQLAlchemyError as e:
-        print(f"Database error occurred: {str(e)}")
-        return None
\ No newline at end of file
+        logger.error("Database error occurred: %s", e)
+        return None
+
+@single_flight
+def get_packages_by_ids(ids: list):
+    """Fungsi untuk mengambil banyak paket wisata sekaligus berdasarkan daftar ID (satu query)"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text("""
+                SELECT id_package, name, description, price, destinations, benefits, image_url, created_at, updated_at
+                FROM packages
+                WHERE id_package = ANY(:ids) AND status = 1;
+            """)
+
+            result = connection.execute(query, {"ids": list(ids)}).mappings().fetchall()
+
+            # Urutan hasil diatur ulang oleh router sesuai urutan ID yang diminta
+            return [
+                {
+                    "id_package": row["id_package"],
+                    "name": row["name"],
+                    "description": row["description"],
+                    "price": row["price"],
+                    "destinations": row["destinations"],
+                    "benefits": row["benefits"],
+                    "image_url": row["image_url"],
+                    "created_at": str(row["created_at"]),
+                    "updated_at": str(row["updated_at"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
@@ -0,0 +1,85 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection, SYNC_SAFETY_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# Konfigurasi tabel yang ikut delta sync (urutan entity dipakai sebagai tie-breaker cursor)
+SYNC_ENTITIES = {
+    "blog": {
+        "table": "blogs",
+        "id_column": "id_blog",
+        "columns": ["id_blog", "title", "content", "image_url", "post_url"],
+    },
+    "destinasi": {
+        "table": "destinations",
+        "id_column": "id_destination",
+        "columns": ["id_destination", "name", "description", "image_url", "location_url", "latitude", "longitude"],
+    },
+    "paket": {
+        "table": "packages",
+        "id_column": "id_package",
+        "columns": ["id_package", "name", "description", "price", "destinations", "benefits", "image_url"],
+    },
+}
+
+def get_entity_changes(entity: str, since, last_entity: str, last_id: int, limit: int,
+                       safety_lag: int = SYNC_SAFETY_LAG_SECONDS):
+    """Fungsi untuk mengambil baris yang dibuat, diubah atau dihapus setelah cursor (updated_at, entity, id)"""
+    config = SYNC_ENTITIES[entity]
+    id_column = config["id_column"]
+
+    # Cursor berupa tuple (updated_at, entity, id) agar tidak ada baris yang terlewat saat updated_at sama
+    if since is None:
+        condition = "TRUE"
+    elif entity > last_entity:
+        condition = "updated_at >= :since"
+    elif entity == last_entity:
+        condition = f"(updated_at > :since OR (updated_at = :since AND {id_column} > :last_id))"
+    else:
+        condition = "updated_at > :since"
+
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            # Tidak memfilter status agar soft delete ikut terkirim sebagai tombstone.
+            # Baris yang terlalu baru ditahan dulu (lihat SYNC_SAFETY_LAG_SECONDS di config)
+            query = text(f"""
+                SELECT {", ".join(config["columns"])}, status, created_at, updated_at
+                FROM {config["table"]}
+                WHERE {condition}
+                  AND updated_at < NOW() - make_interval(secs => :safety_lag)
+                ORDER BY updated_at, {id_column}
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {
+                "since": since,
+                "last_id": last_id,
+                "limit": limit,
+                "safety_lag": safety_lag
+            }).mappings().fetchall()
+
+            changes = []
+            for row in result:
+                change = {
+                    "entity": entity,
+                    "id": row[id_column],
+                    "updated_at": row["updated_at"],
+                }
+                if row["status"] == 1:
+                    change["action"] = "upsert"
+                    change["data"] = {column: row[column] for column in config["columns"]}
+                    change["data"]["created_at"] = str(row["created_at"])
+                    change["data"]["updated_at"] = str(row["updated_at"])
+                else:
+                    change["action"] = "delete"  # Tombstone: hanya ID yang dikirim
+                    change["data"] = None
+                changes.append(change)
+            return changes
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
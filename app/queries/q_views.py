@@ -0,0 +1,82 @@
+import logging
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..utils.config import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+# Tabel sumber untuk ranking per entity
+POPULAR_ENTITIES = {
+    "destinasi": {"table": "destinations", "id_column": "id_destination", "title_column": "name"},
+    "paket": {"table": "packages", "id_column": "id_package", "title_column": "name"},
+    "blog": {"table": "blogs", "id_column": "id_blog", "title_column": "title"},
+}
+
+def add_view_counts(rows: list):
+    """Fungsi untuk menambah jumlah view harian dalam satu upsert (rows: list of (entity, id, views))"""
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.begin() as connection:
+            query = text("""
+                INSERT INTO view_counts (entity, entity_id, day, views)
+                SELECT v.entity, v.entity_id, CURRENT_DATE, v.views
+                FROM unnest(
+                    CAST(:entities AS VARCHAR[]),
+                    CAST(:entity_ids AS INTEGER[]),
+                    CAST(:views AS BIGINT[])
+                ) AS v(entity, entity_id, views)
+                ON CONFLICT (entity, entity_id, day)
+                DO UPDATE SET views = view_counts.views + EXCLUDED.views;
+            """)
+
+            connection.execute(query, {
+                "entities": [row[0] for row in rows],
+                "entity_ids": [row[1] for row in rows],
+                "views": [row[2] for row in rows]
+            })
+            return len(rows)
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
+
+def get_popular(entity: str, window_days: int, limit: int):
+    """Fungsi untuk mengambil ranking item aktif dengan view terbanyak dalam N hari terakhir"""
+    config = POPULAR_ENTITIES[entity]
+    conn = get_connection()  # Membuka koneksi ke database
+    try:
+        with conn.connect() as connection:
+            query = text(f"""
+                SELECT t.{config["id_column"]} AS id, t.{config["title_column"]} AS title, t.image_url,
+                       v.views
+                FROM (
+                    SELECT entity_id, SUM(views) AS views
+                    FROM view_counts
+                    WHERE entity = :entity
+                      AND day > CURRENT_DATE - CAST(:window_days AS INTEGER)
+                    GROUP BY entity_id
+                ) v
+                JOIN {config["table"]} t ON t.{config["id_column"]} = v.entity_id AND t.status = 1
+                ORDER BY v.views DESC, t.{config["id_column"]} DESC
+                LIMIT :limit;
+            """)
+
+            result = connection.execute(query, {
+                "entity": entity,
+                "window_days": window_days,
+                "limit": limit
+            }).mappings().fetchall()
+
+            return [
+                {
+                    "id": row["id"],
+                    "title": row["title"],
+                    "image_url": row["image_url"],
+                    "views": int(row["views"]),
+                }
+                for row in result
+            ]
+    except SQLAlchemyError as e:
+        logger.error("Database error occurred: %s", e)
+        return None
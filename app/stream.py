@@ -0,0 +1,60 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from .utils.config import STREAM_HEARTBEAT_SECONDS
+from .utils.events import broker
+
+
+router = APIRouter()
+
+
+@router.get("/stream/changes", tags=["Stream"])
+async def stream_changes(request: Request):
+    """Endpoint Server-Sent Events: push event perubahan destinasi, paket dan blog (entity, id, action)"""
+    queue = broker.subscribe()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # Heartbeat agar koneksi idle tidak diputus proxy
+                    continue
+                yield f"event: change\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws/changes")
+async def websocket_changes(websocket: WebSocket):
+    """WebSocket: push event perubahan yang sama dengan /stream/changes"""
+    queue = broker.subscribe()
+    if queue is None:
+        await websocket.close(code=1013)  # Try again later
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(queue)
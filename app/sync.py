@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+from .queries.q_sync import SYNC_ENTITIES, get_entity_changes
+
+
+router = APIRouter()
+
+# Pydantic model untuk satu perubahan (upsert atau tombstone)
+class ChangeItem(BaseModel):
+    entity: Literal["destinasi", "paket", "blog"]
+    id: int
+    action: Literal["upsert", "delete"]
+    data: Optional[Dict[str, Any]] = None  # None untuk tombstone (delete)
+    updated_at: str
+
+# Pydantic model untuk response delta sync
+class ChangesResponse(BaseModel):
+    changes: List[ChangeItem]
+    next_token: str
+    has_more: bool
+
+
+def encode_sync_token(updated_at: datetime, entity: str, id_: int):
+    """Membuat sync token (opaque) dari cursor (updated_at, entity, id)"""
+    payload = json.dumps({"t": updated_at.isoformat(), "e": entity, "i": id_})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_sync_token(token: str):
+    """Membaca cursor dari sync token, raise ValueError jika token tidak valid"""
+    payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return datetime.fromisoformat(payload["t"]), str(payload["e"]), int(payload["i"])
+
+
+@router.get("/changes", response_model=ChangesResponse, tags=["Sync"])
+async def get_changes(since: Optional[str] = None, limit: int = Query(500, ge=1, le=1000)):
+    """Endpoint delta sync: perubahan destinasi, paket dan blog setelah token (tanpa token = sync penuh)"""
+    since_at, last_entity, last_id = None, "", 0
+    if since:
+        try:
+            since_at, last_entity, last_id = decode_sync_token(since)
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    # Ambil `limit + 1` baris per tabel agar bisa tahu masih ada perubahan setelah halaman ini
+    changes = []
+    for entity in SYNC_ENTITIES:
+        entity_changes = await run_in_threadpool(get_entity_changes, entity, since_at, last_entity, last_id, limit + 1)
+        if entity_changes is None:
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+        changes.extend(entity_changes)
+
+    # Gabungkan hasil per tabel lalu ambil `limit` perubahan pertama berdasarkan cursor
+    changes.sort(key=lambda c: (c["updated_at"], c["entity"], c["id"]))
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if changes:
+        last = changes[-1]
+        next_token = encode_sync_token(last["updated_at"], last["entity"], last["id"])
+    elif since:
+        next_token = since  # Tidak ada perubahan, token tetap
+    else:
+        next_token = encode_sync_token(datetime(1970, 1, 1), "", 0)
+
+    for change in changes:
+        change["updated_at"] = str(change["updated_at"])
+    return {"changes": changes, "next_token": next_token, "has_more": has_more}
@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import itertools
+import json
+from fastapi import HTTPException
+
+from .config import (
+    decode_access_token, revocation_list, ADMISSION_DEFAULT_LIMIT, ADMISSION_GLOBAL_LIMIT, ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT, ADMISSION_RETRY_AFTER, ADMISSION_ROUTE_COSTS, ADMISSION_ROUTE_LIMITS,
+)
+from .metrics import metrics
+
+
+# Prioritas antrean: angka kecil dilayani lebih dulu
+PRIORITY_ADMIN_WRITE = 0
+PRIORITY_READ = 1
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Path yang tidak dibatasi (stream berumur panjang dan dokumentasi)
+EXEMPT_PREFIXES = ("/stream", "/ws", "/docs", "/redoc", "/openapi.json")
+
+# Grup route yang dikenal (segmen pertama path), path lain masuk grup "default"
+ROUTE_GROUPS = ("auth", "destinasi", "paket", "blog", "home", "popular", "changes", "metrics", "profiles")
+DEFAULT_GROUP = "default"
+
+
+class AdmissionGate:
+    """Membatasi jumlah request bersamaan dengan antrean terbatas berprioritas"""
+
+    def __init__(self, name: str, limit: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._queued = 0
+        self._waiters = []  # Heap berisi (priority, urutan, cost, future)
+        self._sequence = itertools.count()
+
+    def _update_gauges(self):
+        metrics.set_gauge(f"admission.{self.name}.active", self._active)
+        metrics.set_gauge(f"admission.{self.name}.queued", self._queued)
+
+    async def acquire(self, priority: int, cost: int = 1):
+        """Mengambil `cost` slot, False jika antrean penuh atau waktu tunggu habis"""
+        cost = min(cost, self.limit)  # Request yang lebih mahal dari batas tetap bisa dilayani sendirian
+        if self._active + cost <= self.limit and self._queued == 0:
+            self._active += cost
+            self._update_gauges()
+            return True
+
+        if self._queued >= self.max_queue:
+            metrics.incr(f"admission.{self.name}.shed")
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), cost, future))
+        self._queued += 1
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+            return True  # Slot diserahkan oleh _wake()
+        except asyncio.TimeoutError:
+            # wait_for bisa timeout tepat setelah slot diserahkan: slot tetap dipakai agar tidak bocor
+            if future.done() and not future.cancelled():
+                return True
+            metrics.incr(f"admission.{self.name}.shed")
+            metrics.incr(f"admission.{self.name}.timeout")
+            return False
+        except asyncio.CancelledError:
+            # Client pergi tepat setelah slot diserahkan: kembalikan slot agar tidak bocor
+            if future.done() and not future.cancelled():
+                self.release(cost)
+            raise
+        finally:
+            future.cancel()  # Tidak berpengaruh jika future sudah selesai
+            self._queued -= 1
+            self._wake()  # Waiter yang keluar bisa jadi sedang menahan waiter lain yang lebih murah
+
+    def release(self, cost: int = 1):
+        """Melepas slot lalu menyerahkannya ke waiter dengan prioritas tertinggi jika cukup"""
+        self._active -= min(cost, self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            _, _, cost, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)  # Waiter sudah timeout atau dibatalkan
+                continue
+            if self._active + cost > self.limit:
+                break  # Urutan prioritas dijaga, waiter berikutnya tidak boleh menyalip
+            heapq.heappop(self._waiters)
+            self._active += cost
+            future.set_result(True)
+        self._update_gauges()
+
+
+def route_group(path: str):
+    """Menentukan grup route dari path, None jika path tidak dibatasi"""
+    if path.startswith(EXEMPT_PREFIXES):
+        return None
+    segment = path.strip("/").split("/", 1)[0]
+    # Segmen tak dikenal tidak membuat gate baru agar path acak tidak menambah memori dan metrics
+    return segment if segment in ROUTE_GROUPS else DEFAULT_GROUP
+
+
+def is_admin_write(scope, headers: dict):
+    """Write dengan token admin yang valid dan belum dicabut (header Authorization saja tidak cukup)
+
+    Berjalan di event loop sebelum gate, jadi tidak boleh menyentuh database: token yang terkena
+    Bloom filter cukup diperlakukan sebagai read biasa, pengecekan penuh dilakukan dependency route.
+    """
+    if scope["method"] in SAFE_METHODS:
+        return False
+    authorization = headers.get(b"authorization")
+    if not authorization:
+        return False
+    try:
+        claims = decode_access_token(authorization.decode("latin-1").replace("Bearer ", ""))
+    except HTTPException:
+        return False
+    if revocation_list.is_revoked(claims["jti"], claims["exp"], claims["sub"], confirm=False):
+        return False
+    return claims.get("role") == "admin"
+
+
+class AdmissionControlMiddleware:
+    """Middleware ASGI: gagal cepat dengan 503 + Retry-After saat antrean penuh, bukan menunggu pool_timeout
+
+    Setiap request melewati gate grupnya lalu gate global yang berukuran sama dengan pool database,
+    sehingga total koneksi yang dipakai semua grup tidak melebihi kapasitas pool
+    """
+
+    def __init__(self, app, default_limit: int = ADMISSION_DEFAULT_LIMIT, route_limits: dict = None,
+                 global_limit: int = ADMISSION_GLOBAL_LIMIT, route_costs: dict = None,
+                 max_queue: int = ADMISSION_QUEUE_SIZE, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+                 retry_after: int = ADMISSION_RETRY_AFTER):
+        self.app = app
+        route_limits = ADMISSION_ROUTE_LIMITS if route_limits is None else route_limits
+        self.route_costs = ADMISSION_ROUTE_COSTS if route_costs is None else route_costs
+        self.retry_after = retry_after
+        # Gate hanya dibuat untuk grup yang dikenal, jumlahnya tetap
+        self._gates = {
+            group: AdmissionGate(group, route_limits.get(group, default_limit), max_queue, queue_timeout)
+            for group in ROUTE_GROUPS + (DEFAULT_GROUP,)
+        }
+        self._global_gate = AdmissionGate("global", global_limit, max_queue, queue_timeout)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = route_group(scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Write dari admin didahulukan dari read anonim
+        priority = PRIORITY_ADMIN_WRITE if is_admin_write(scope, dict(scope["headers"])) else PRIORITY_READ
+        cost = self.route_costs.get(group, 1)  # Grup tanpa query database (cost 0) tidak memakai gate global
+
+        gate = self._gates[group]
+        if not await gate.acquire(priority):
+            await self._reject(send)
+            return
+        try:
+            if cost > 0 and not await self._global_gate.acquire(priority, cost):
+                await self._reject(send)
+                return
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if cost > 0:
+                    self._global_gate.release(cost)
+        finally:
+            gate.release()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
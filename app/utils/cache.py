@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from .config import CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, CACHE_STALE_MAX_SECONDS, CACHE_REFRESH_CONCURRENCY
+from .metrics import metrics
+
+
+class _NotFound:
+    """Penanda dari loader bahwa data memang tidak ada (dihapus/nonaktif), berbeda dari None yang berarti query gagal"""
+
+    def __repr__(self):
+        return "NOT_FOUND"
+
+
+NOT_FOUND = _NotFound()
+
+
+class TTLCache:
+    """Cache in-memory per worker dengan masa berlaku (TTL) dan batas jumlah key (LRU)
+
+    Entry yang sudah lewat TTL tidak langsung dibuang: selama umurnya belum melewati
+    `stale_max` entry tersebut masih bisa disajikan oleh `fetch` (stale-while-revalidate).
+
+    Hasil loader hanya disimpan jika key tidak di-delete/invalidate selama loader berjalan
+    (generation per key), sehingga data sebelum write tidak tersimpan sebagai data segar.
+    """
+
+    def __init__(self, ttl: int = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES,
+                 stale_max: int = CACHE_STALE_MAX_SECONDS, max_refreshing: int = CACHE_REFRESH_CONCURRENCY):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_max = max(stale_max, ttl)
+        self.max_refreshing = max_refreshing
+        self._data = OrderedDict()
+        self._lock = threading.Lock()  # Query dijalankan di threadpool, jadi akses harus thread-safe
+        self._refreshing = set()  # Key yang sedang di-refresh di background
+        self._tasks = set()
+        self._loading = {}  # key -> [generation, jumlah loader yang berjalan], hanya untuk key yang sedang dimuat
+
+    def _get_entry(self, key: str):
+        """Mengambil (umur, value) dari cache, None jika tidak ada atau sudah melewati batas stale"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            fresh_until, stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age > self.stale_max:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return fresh_until, age, value
+
+    def get(self, key: str):
+        """Mengambil value dari cache, None jika tidak ada atau sudah kadaluarsa"""
+        entry = self._get_entry(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[2]
+
+    def set(self, key: str, value, ttl: int = None):
+        """Menyimpan value ke cache (value None dan NOT_FOUND tidak disimpan)"""
+        if value is None or value is NOT_FOUND:
+            return
+        now = time.monotonic()
+        fresh_until = now + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (fresh_until, now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)  # Buang key yang paling lama tidak dipakai
+
+    def _begin_load(self, key: str):
+        """Mencatat loader yang mulai berjalan, mengembalikan generation key saat ini"""
+        with self._lock:
+            state = self._loading.setdefault(key, [0, 0])
+            state[1] += 1
+            return state[0]
+
+    def _end_load(self, key: str, generation: int, value, ttl: int = None):
+        """Menyimpan hasil loader jika key tidak di-invalidate selama loader berjalan"""
+        with self._lock:
+            state = self._loading[key]
+            unchanged = state[0] == generation
+            state[1] -= 1
+            if state[1] == 0:
+                del self._loading[key]
+        if unchanged:
+            self.set(key, value, ttl)
+        else:
+            metrics.incr("cache.load_discarded")  # Ada write/eviction saat loader berjalan
+        return unchanged
+
+    def _bump(self, key: str):
+        # Dipanggil dengan lock: loader yang sedang berjalan untuk key ini tidak boleh menyimpan hasilnya
+        state = self._loading.get(key)
+        if state is not None:
+            state[0] += 1
+
+    async def fetch(self, key: str, loader, ttl: int = None):
+        """Stale-while-revalidate: mengembalikan (value, umur_stale)
+
+        `loader` adalah async callable tanpa argumen yang mengembalikan None jika query gagal
+        dan boleh mengembalikan NOT_FOUND jika data sudah tidak ada (key langsung dibuang).
+        Data basi langsung dikembalikan sementara satu task background memperbaruinya;
+        jika DB gagal, data basi tetap disajikan sampai umurnya melewati `stale_max`.
+        Hasil NOT_FOUND diteruskan ke pemanggil agar bisa dibedakan dari error (None).
+        """
+        entry = self._get_entry(key)
+        if entry is not None:
+            fresh_until, age, value = entry
+            if fresh_until >= time.monotonic():
+                return value, None
+            self._schedule_refresh(key, loader, ttl)
+            metrics.incr("cache.stale_served")
+            return value, age
+
+        metrics.incr("cache.miss")
+        generation = self._begin_load(key)
+        try:
+            value = await loader()
+        except BaseException:
+            self._end_load(key, generation, None)
+            raise
+        self._end_load(key, generation, value, ttl)
+        return value, None
+
+    def _schedule_refresh(self, key: str, loader, ttl: int = None):
+        """Menjalankan refresh di background, maksimal satu task per key"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            if len(self._refreshing) >= self.max_refreshing:
+                # Data basi tetap disajikan, refresh dicoba lagi oleh request berikutnya
+                metrics.incr("cache.refresh_skipped")
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            generation = self._begin_load(key)
+            value = None
+            try:
+                value = await loader()
+                if value is None:
+                    metrics.incr("cache.refresh_failed")  # Data basi tetap dipakai
+                elif value is NOT_FOUND:
+                    # Data dihapus/nonaktif (misalnya NOTIFY terlewat saat listener reconnect): jangan sajikan lagi
+                    metrics.incr("cache.refresh_not_found")
+                    self.delete(key)
+            finally:
+                self._end_load(key, generation, value, ttl)
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)  # Simpan referensi agar task tidak di-garbage collect
+        task.add_done_callback(self._tasks.discard)
+
+    def delete(self, *keys: str):
+        """Menghapus key tertentu dari cache"""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._bump(key)
+
+    def get_many(self, prefix: str, ids: list, loader, id_field: str):
+        """Mengambil banyak item sekaligus; item yang belum ada di cache diambil dengan satu panggilan loader"""
+        found = {}
+        missing = []
+        for id_ in dict.fromkeys(ids):
+            value = self.get(f"{prefix}{id_}")
+            if value is None:
+                missing.append(id_)
+            else:
+                found[id_] = value
+
+        if missing:
+            generations = {id_: self._begin_load(f"{prefix}{id_}") for id_ in missing}
+            rows = None
+            try:
+                rows = loader(missing)
+            finally:
+                loaded = {row[id_field]: row for row in rows or []}
+                for id_, generation in generations.items():
+                    self._end_load(f"{prefix}{id_}", generation, loaded.get(id_))
+            if rows is None:
+                return None  # Terjadi error pada query
+            found.update(loaded)
+        return found
+
+    def invalidate(self, *prefixes: str):
+        """Menghapus semua key yang diawali salah satu prefix"""
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefixes)]:
+                del self._data[key]
+            for key in [k for k in self._loading if k.startswith(prefixes)]:
+                self._bump(key)
+
+
+def set_stale_headers(response, stale_age):
+    """Menandai response yang disajikan dari data basi"""
+    if stale_age is not None:
+        response.headers["X-Cache"] = "STALE"
+        response.headers["Age"] = str(int(stale_age))
+
+
+# Instance cache yang dipakai bersama oleh semua router
+cache = TTLCache()
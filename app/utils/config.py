@@ -1,11 +1,14 @@
 import os
+import uuid
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from jose import jwt
+from jose import jwt, JWTError
 from fastapi import Depends, HTTPException
 from fastapi.security import APIKeyHeader
 
+from .revocation import RevocationList
+
 
 # Secret key dan algoritma untuk JWT
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_secret_key")
@@ -29,11 +32,15 @@ password = os.getenv("DB_PASS")
 DATABASE_URL = f'postgresql+psycopg2://{username}:{password}@{host}:{port}/{dbname}'
 
 # ⛽️ Engine dibuat sekali dan dipakai ulang (pool aman)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,
-    max_overflow=5,
-    pool_timeout=30,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
     pool_recycle=1800,
     pool_pre_ping=True  # opsional tapi direkomendasikan
 )
@@ -41,17 +48,129 @@ engine = create_engine(
 def get_connection():
     return engine
 
+# === Konfigurasi Pencabutan Token (logout) === #
+REVOCATION_BUCKET_SECONDS = int(os.getenv("REVOCATION_BUCKET_SECONDS", "3600"))  # Lebar jendela kadaluarsa per bucket
+REVOCATION_BUCKET_CAPACITY = int(os.getenv("REVOCATION_BUCKET_CAPACITY", "10000"))  # Perkiraan token dicabut per bucket
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "10"))  # Interval sinkronisasi antar worker
+
+revocation_list = RevocationList(REVOCATION_BUCKET_SECONDS, REVOCATION_BUCKET_CAPACITY, hash_count=10)
+
 # Fungsi untuk membuat JWT
 def create_access_token(data: dict, expires_delta: timedelta = timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})  # jti dipakai untuk logout/pencabutan
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Fungsi untuk membaca isi token JWT (signature dan masa berlaku diverifikasi)
+def decode_access_token(token: str):
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if not claims.get("jti") or not claims.get("sub") or not claims.get("exp"):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return claims
+
 # Fungsi untuk validasi token JWT
 def validate_jwt_token(authorization: str = Depends(api_key_header)):
     if authorization is None:
         raise HTTPException(status_code=403, detail="Not authenticated")
     token = authorization.replace("Bearer ", "")  # Menghapus "Bearer" agar hanya menyisakan token
-    return token
\ No newline at end of file
+    claims = decode_access_token(token)
+    if revocation_list.is_revoked(claims["jti"], claims["exp"], claims["sub"]):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return token
+
+# === Konfigurasi Cache === #
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))  # Masa berlaku cache dalam detik
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))  # Jumlah maksimum key per worker
+CACHE_STALE_MAX_SECONDS = int(os.getenv("CACHE_STALE_MAX_SECONDS", "3600"))  # Batas umur data basi saat DB bermasalah
+# Maks refresh background yang berjalan bersamaan agar tidak merebut koneksi pool dari request yang sudah diterima
+CACHE_REFRESH_CONCURRENCY = int(os.getenv("CACHE_REFRESH_CONCURRENCY", str(max(1, DB_POOL_SIZE // 5))))
+
+
+# === Konfigurasi Stream Perubahan (SSE / WebSocket) === #
+CHANGES_CHANNEL = "catalog_changes"  # Nama channel LISTEN/NOTIFY di Postgres
+STREAM_CLIENT_BUFFER = int(os.getenv("STREAM_CLIENT_BUFFER", "100"))  # Maks event tertunda per client
+STREAM_MAX_CLIENTS = int(os.getenv("STREAM_MAX_CLIENTS", "5000"))  # Maks koneksi stream per worker
+STREAM_HEARTBEAT_SECONDS = int(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+
+# === Konfigurasi Delta Sync (/changes) === #
+# updated_at diisi NOW() (waktu mulai transaksi): baris yang lebih baru dari batas ini belum dikirim
+# agar transaksi yang mulai lebih dulu tapi commit belakangan tidak terlewat oleh cursor client.
+# Harus lebih lama dari transaksi write terlama.
+SYNC_SAFETY_LAG_SECONDS = int(os.getenv("SYNC_SAFETY_LAG_SECONDS", "10"))
+
+
+# === Konfigurasi Admission Control === #
+# Batas koneksi database yang boleh dipakai bersamaan oleh semua grup route (gate global = kapasitas pool)
+ADMISSION_GLOBAL_LIMIT = int(os.getenv("ADMISSION_GLOBAL_LIMIT", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+# Batas request bersamaan per grup route agar satu grup tidak menghabiskan seluruh pool
+ADMISSION_DEFAULT_LIMIT = int(os.getenv("ADMISSION_DEFAULT_LIMIT", str(max(1, ADMISSION_GLOBAL_LIMIT // 2))))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "50"))  # Maks request yang menunggu per grup
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))  # Maks detik menunggu di antrean
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))  # Nilai header Retry-After (detik)
+# Override per grup, contoh: ADMISSION_ROUTE_LIMITS="auth=4,paket=8"
+ADMISSION_ROUTE_LIMITS = {
+    name.strip(): int(limit)
+    for name, limit in (
+        item.split("=", 1) for item in os.getenv("ADMISSION_ROUTE_LIMITS", "").split(",") if "=" in item
+    )
+}
+# Jumlah koneksi database yang dipakai bersamaan oleh satu request per grup (default 1, 0 = tanpa database),
+# contoh: /home menjalankan 3 query paralel
+ADMISSION_ROUTE_COSTS = {
+    "home": 3,
+    "metrics": 0,
+    "profiles": 0,
+    **{
+        name.strip(): int(cost)
+        for name, cost in (
+            item.split("=", 1) for item in os.getenv("ADMISSION_ROUTE_COSTS", "").split(",") if "=" in item
+        )
+    },
+}
+
+# === Konfigurasi Rate Limit === #
+# Format kebijakan "jumlah/detik" (token bucket: kapasitas = jumlah, isi ulang = jumlah/detik)
+RATE_LIMIT_POLICIES = {
+    "auth": os.getenv("RATE_LIMIT_AUTH", "10/60"),                  # Per IP untuk /auth
+    "auth_account": os.getenv("RATE_LIMIT_AUTH_ACCOUNT", "5/300"),  # Login gagal per (akun, IP)
+    "destinasi": os.getenv("RATE_LIMIT_DESTINASI", "120/60"),
+    "paket": os.getenv("RATE_LIMIT_PAKET", "120/60"),
+    "blog": os.getenv("RATE_LIMIT_BLOG", "120/60"),
+    "home": os.getenv("RATE_LIMIT_HOME", "120/60"),
+    "popular": os.getenv("RATE_LIMIT_POPULAR", "120/60"),
+}
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # Batas memori bucket per worker
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"  # Pakai X-Forwarded-For
+# Jumlah proxy terpercaya di depan aplikasi: IP client diambil dari entri X-Forwarded-For ke-N dari kanan
+RATE_LIMIT_PROXY_HOPS = max(1, int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1")))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")  # Opsional: backend bersama antar worker
+
+# === Konfigurasi Logging === #
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Log dibuang jika antrean penuh (tidak memblokir)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))  # Porsi access log sukses yang dicatat
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))  # Request lambat selalu dicatat
+
+# === Konfigurasi Profiling On-Demand === #
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))  # Interval sampling (detik)
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))  # Jumlah hasil profil yang disimpan per worker
+
+# === Konfigurasi View Counter === #
+VIEW_FLUSH_SECONDS = int(os.getenv("VIEW_FLUSH_SECONDS", "30"))  # Interval flush counter ke database
+POPULAR_CACHE_SECONDS = int(os.getenv("POPULAR_CACHE_SECONDS", "300"))  # Masa berlaku cache ranking
+
+# === Konfigurasi Statement Timeout === #
+QUERY_TIMEOUT_DEFAULT_MS = int(os.getenv("QUERY_TIMEOUT_DEFAULT_MS", "5000"))  # SET LOCAL statement_timeout
+# Override per grup route (sama dengan grup admission control), contoh: QUERY_TIMEOUT_ROUTE_MS="changes=15000,home=3000"
+QUERY_TIMEOUT_ROUTE_MS = {
+    name.strip(): int(timeout)
+    for name, timeout in (
+        item.split("=", 1) for item in os.getenv("QUERY_TIMEOUT_ROUTE_MS", "").split(",") if "=" in item
+    )
+}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from sqlalchemy import text
+
+from .config import engine, CHANGES_CHANNEL, STREAM_CLIENT_BUFFER, STREAM_MAX_CLIENTS
+from .metrics import metrics
+from .cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def notify_change(connection, entity: str, entity_id: int, action: str):
+    """Mengirim event perubahan lewat pg_notify (terkirim ke listener hanya setelah transaksi commit)"""
+    payload = json.dumps({"entity": entity, "id": entity_id, "action": action})
+    connection.execute(
+        text("SELECT pg_notify(:channel, :payload);"),
+        {"channel": CHANGES_CHANNEL, "payload": payload}
+    )
+
+
+def invalidate_cache(event: dict):
+    """Menghapus cache yang terpengaruh event perubahan (termasuk perubahan dari worker lain)"""
+    entity = event.get("entity")
+    cache.delete(f"{entity}:{event.get('id')}")
+    cache.invalidate("home:", f"{entity}:list")
+
+
+class ChangeBroker:
+    """Menyebarkan event perubahan ke semua client stream di worker ini"""
+
+    def __init__(self, buffer_size: int = STREAM_CLIENT_BUFFER, max_clients: int = STREAM_MAX_CLIENTS):
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._loop = None
+
+    def bind(self, loop):
+        """Mengikat broker ke event loop worker (dipanggil saat startup)"""
+        self._loop = loop
+
+    def subscribe(self):
+        """Mendaftarkan client baru, None jika jumlah client sudah maksimum"""
+        if len(self._subscribers) >= self.max_clients:
+            metrics.incr("stream.rejected")
+            return None
+        queue = asyncio.Queue(maxsize=self.buffer_size)  # Buffer per client dibatasi
+        self._subscribers.add(queue)
+        metrics.set_gauge("stream.clients", len(self._subscribers))
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        metrics.set_gauge("stream.clients", len(self._subscribers))
+
+    def publish(self, event: dict):
+        """Dipanggil dari thread listener, diteruskan ke event loop secara thread-safe"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fanout, event)
+
+    def _fanout(self, event: dict):
+        metrics.incr("stream.events")
+        for queue in self._subscribers:
+            if queue.full():
+                # Client lambat: buang event tertua agar memori tetap terbatas
+                queue.get_nowait()
+                metrics.incr("stream.dropped")
+            queue.put_nowait(event)
+
+
+class ChangeListener(threading.Thread):
+    """Satu koneksi LISTEN per worker yang meneruskan NOTIFY ke broker"""
+
+    def __init__(self, broker: ChangeBroker):
+        super().__init__(name="change-listener", daemon=True)
+        self.broker = broker
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _connect(self):
+        # Koneksi khusus di luar pool agar tidak memakai slot pool_size
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        dbapi_connection = engine.dialect.connect(*cargs, **cparams)
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANGES_CHANNEL};")
+        return dbapi_connection
+
+    def run(self):
+        backoff = 1
+        while not self._stop_event.is_set():
+            dbapi_connection = None
+            try:
+                dbapi_connection = self._connect()
+                backoff = 1
+                while not self._stop_event.is_set():
+                    # Tunggu notifikasi maksimal 5 detik agar bisa berhenti dengan rapi
+                    if select.select([dbapi_connection], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notify = dbapi_connection.notifies.pop(0)
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            continue
+                        invalidate_cache(event)
+                        self.broker.publish(event)
+            except Exception as e:
+                logger.warning("Change listener error occurred: %s", e)
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, 30)  # Reconnect dengan backoff
+            finally:
+                if dbapi_connection is not None:
+                    try:
+                        dbapi_connection.close()
+                    except Exception:
+                        pass
+
+
+# Instance broker yang dipakai bersama oleh router stream
+broker = ChangeBroker()
@@ -0,0 +1,163 @@
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import LOG_LEVEL, LOG_QUEUE_SIZE, ACCESS_LOG_SAMPLE_RATE, ACCESS_LOG_SLOW_MS
+from .metrics import metrics
+
+
+# ID request yang sedang diproses, ikut terbawa ke threadpool (run_in_threadpool menyalin context)
+request_id_var = ContextVar("request_id", default="-")
+
+# Atribut bawaan LogRecord, sisanya dianggap field tambahan (extra=...)
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log sebagai satu baris JSON"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text  # Traceback sudah diformat oleh NonBlockingQueueHandler
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Menempelkan request ID ke record di thread pemanggil (sebelum masuk antrean)"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class AccessLogSampler(logging.Filter):
+    """Sampling access log: error dan request lambat selalu dicatat, sisanya sesuai rate"""
+
+    def __init__(self, sample_rate: float = ACCESS_LOG_SAMPLE_RATE, slow_ms: float = ACCESS_LOG_SLOW_MS):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    def filter(self, record):
+        if getattr(record, "status", 0) >= 400 or getattr(record, "duration_ms", 0) >= self.slow_ms:
+            return True
+        return random.random() < self.sample_rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler yang membuang log saat antrean penuh agar hot path tidak pernah menunggu"""
+
+    def prepare(self, record):
+        """Salinan record untuk antrean: message digabung dengan args dan traceback diformat terpisah
+
+        prepare() bawaan memformat traceback ke dalam message lalu menghapus exc_info,
+        sehingga JsonFormatter tidak bisa menulis field `exception`.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None  # Traceback (frame) tidak ikut ditahan di antrean
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr("logging.dropped")
+
+
+_listener = None
+
+
+def setup_logging():
+    """Memasang QueueHandler pada logger `app`; penulisan ke stdout dilakukan oleh thread listener"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(queue_handler)
+    app_logger.propagate = False
+    logging.getLogger("app.access").addFilter(AccessLogSampler())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Menghentikan thread listener setelah semua log di antrean ditulis"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """Middleware ASGI: membuat/meneruskan X-Request-ID dan mencatat access log"""
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger("app.access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            self.logger.info(
+                "request",
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started_at) * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
@@ -0,0 +1,29 @@
+import threading
+
+
+class Metrics:
+    """Registry sederhana untuk counter dan gauge per worker (thread-safe)"""
+
+    def __init__(self):
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: int = 1):
+        """Menambah nilai counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value):
+        """Menyimpan nilai gauge (nilai terakhir)"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self):
+        """Mengembalikan salinan semua metrics dalam bentuk dictionary"""
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+
+# Instance metrics yang dipakai bersama oleh semua modul
+metrics = Metrics()
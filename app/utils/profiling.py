@@ -0,0 +1,250 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from .config import (
+    engine, decode_access_token, revocation_list, PROFILE_SAMPLE_INTERVAL, PROFILE_MAX_STORED,
+)
+
+
+# Sesi profiling milik request yang sedang diproses (None jika tidak diprofil)
+current_session = ContextVar("profile_session", default=None)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERIES_DIR = os.path.join(APP_DIR, "queries")
+
+
+def _frame_label(code):
+    """Label frame untuk flame graph: nama fungsi (file:baris)"""
+    filename = code.co_filename
+    if filename.startswith(APP_DIR):
+        filename = "app" + filename[len(APP_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """Sampling profiler untuk satu request: thread event loop dan thread yang menjalankan query-nya
+
+    Thread threadpool hanya di-sampling selama memegang koneksi milik request ini (checkout sampai checkin).
+    Thread event loop dipakai bersama semua request di worker, jadi sampelnya (akar "event-loop")
+    bisa memuat kerja request lain yang berjalan bersamaan dan tidak dihitung ke `queries_ms`.
+    """
+
+    def __init__(self, method: str, path: str, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.loop_thread_id = threading.get_ident()
+        self.worker_threads = Counter()  # Thread threadpool -> jumlah koneksi yang sedang dipegang
+        self.stacks = Counter()  # Stack terlipat (folded) -> jumlah sampel
+        self.ticks = 0
+        self.query_ticks = 0  # Tick saat ada thread yang sedang berada di app/queries
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self._stop_event = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id[:8]}", daemon=True)
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self.total_seconds = time.perf_counter() - self.started_at
+        self._stop_event.set()
+        self._sampler.join()
+
+    def _sample(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            in_queries = False
+            threads = [(self.loop_thread_id, "event-loop")]
+            threads += [
+                (thread_id, "worker") for thread_id in list(self.worker_threads) if thread_id != self.loop_thread_id
+            ]
+            for thread_id, root in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    if root == "worker" and code.co_filename.startswith(QUERIES_DIR):
+                        in_queries = True
+                    stack.append(_frame_label(code))
+                    frame = frame.f_back
+                if stack:
+                    stack.append(root)
+                    self.stacks[";".join(reversed(stack))] += 1
+            self.ticks += 1
+            if in_queries:
+                self.query_ticks += 1
+
+    def folded(self):
+        """Stack terlipat, bisa langsung dipakai flamegraph.pl / speedscope"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def call_tree(self, limit: int = 30):
+        """Fungsi dengan jumlah sampel inklusif terbanyak"""
+        inclusive = Counter()
+        for stack, count in self.stacks.items():
+            for label in set(stack.split(";")):
+                inclusive[label] += count
+        total = sum(self.stacks.values()) or 1
+        return [
+            {"function": label, "samples": count, "percent": round(count * 100 / total, 1)}
+            for label, count in inclusive.most_common(limit)
+        ]
+
+    def summary(self):
+        total_ms = self.total_seconds * 1000
+        queries_ms = min(total_ms, self.query_ticks * self.interval * 1000)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "total_ms": round(total_ms, 2),
+            "queries_ms": round(queries_ms, 2),  # Waktu di fungsi app/queries (estimasi dari sampel)
+            "db_ms": round(self.db_seconds * 1000, 2),  # Waktu eksekusi statement di database (terukur)
+            "db_statements": self.db_statements,
+            "response_ms": round(total_ms - queries_ms, 2),  # Validasi, routing dan serialisasi
+            "samples": self.ticks,
+            "call_tree": self.call_tree(),
+        }
+
+
+# === Event SQLAlchemy, hanya terpasang selama ada sesi profiling aktif === #
+_listener_lock = threading.Lock()
+_active_sessions = 0
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    session = current_session.get()
+    if session is not None:
+        session.worker_threads[threading.get_ident()] += 1  # Thread threadpool ikut di-sampling sejak ambil koneksi
+
+def _on_checkin(dbapi_connection, connection_record):
+    session = current_session.get()
+    if session is None:
+        return
+    # Setelah koneksi dikembalikan, thread bisa melayani request lain sehingga tidak di-sampling lagi
+    thread_id = threading.get_ident()
+    session.worker_threads[thread_id] -= 1
+    if session.worker_threads[thread_id] <= 0:
+        del session.worker_threads[thread_id]
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    session = current_session.get()
+    if session is not None:
+        conn.info.setdefault("profile_started_at", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    session = current_session.get()
+    started = conn.info.get("profile_started_at")
+    if session is not None and started:
+        session.db_seconds += time.perf_counter() - started.pop()
+        session.db_statements += 1
+
+def _attach_listeners():
+    global _active_sessions
+    with _listener_lock:
+        _active_sessions += 1
+        if _active_sessions == 1:
+            event.listen(engine, "checkout", _on_checkout)
+            event.listen(engine, "checkin", _on_checkin)
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def _detach_listeners():
+    global _active_sessions
+    with _listener_lock:
+        _active_sessions -= 1
+        if _active_sessions == 0:
+            event.remove(engine, "checkout", _on_checkout)
+            event.remove(engine, "checkin", _on_checkin)
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfileStore:
+    """Menyimpan hasil profil terakhir di memori worker"""
+
+    def __init__(self, max_items: int = PROFILE_MAX_STORED):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, session: ProfileSession):
+        with self._lock:
+            self._items[session.id] = session
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._items.get(profile_id)
+
+
+profile_store = ProfileStore()
+
+
+def _is_admin(headers: dict):
+    """Profiling hanya untuk admin dengan token yang valid dan belum dicabut"""
+    authorization = headers.get(b"authorization")
+    if not authorization:
+        return False
+    try:
+        claims = decode_access_token(authorization.decode("latin-1").replace("Bearer ", ""))
+    except HTTPException:
+        return False
+    # Tanpa query database (middleware berjalan di event loop): hasil Bloom filter yang belum dikonfirmasi ditolak
+    if revocation_list.is_revoked(claims["jti"], claims["exp"], claims["sub"], confirm=False):
+        return False
+    return claims.get("role") == "admin"
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: request dengan ?profile=1 atau header X-Profile: 1 dari admin dijalankan di bawah profiler
+
+    Tanpa flag, middleware hanya memeriksa query string/header lalu langsung meneruskan request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        requested = headers.get(b"x-profile") == b"1" or (
+            b"profile=" in scope["query_string"]
+            and parse_qs(scope["query_string"].decode("latin-1")).get("profile") == ["1"]
+        )
+        if not requested or not _is_admin(headers):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]
+            await send(message)
+
+        token = current_session.set(session)
+        _attach_listeners()
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session.stop()
+            _detach_listeners()
+            current_session.reset(token)
+            profile_store.add(session)
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from .config import (
+    RATE_LIMIT_POLICIES, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_TRUST_PROXY, RATE_LIMIT_PROXY_HOPS, RATE_LIMIT_REDIS_URL,
+)
+from .metrics import metrics
+
+
+class TokenBucketPolicy:
+    """Kebijakan token bucket: `capacity` token, diisi ulang `capacity` token setiap `period` detik"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.refill_rate = capacity / period  # Token per detik
+
+    @classmethod
+    def parse(cls, spec: str):
+        """Membaca kebijakan dari string "jumlah/detik", contoh "10/60" """
+        count, period = spec.split("/", 1)
+        return cls(int(count), float(period))
+
+
+class InMemoryBackend:
+    """Penyimpanan bucket per worker dengan batas jumlah key (LRU)"""
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, policy: TokenBucketPolicy, consume: bool = True):
+        """Mengambil satu token (atau hanya mengecek jika `consume=False`),
+        mengembalikan (diizinkan, detik_sampai_token_tersedia)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (policy.capacity, now))
+            tokens = min(policy.capacity, tokens + (now - updated_at) * policy.refill_rate)
+            allowed = tokens >= 1
+            if allowed and consume:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # Buang bucket yang paling lama tidak dipakai
+        return allowed, 0 if allowed else (1 - tokens) / policy.refill_rate
+
+
+class RedisBackend:
+    """Backend bersama antar worker memakai Redis (butuh paket `redis`, opsional)"""
+    blocking = True
+
+    # Token bucket atomik di sisi Redis
+    SCRIPT = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local consume = tonumber(ARGV[4])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or capacity
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + (now - ts) * rate)
+        local allowed = 0
+        if tokens >= 1 then
+            tokens = tokens - consume
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        import redis  # Import di sini karena redis hanya dibutuhkan jika backend ini dipakai
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, policy: TokenBucketPolicy, consume: bool = True):
+        allowed, tokens = self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[policy.capacity, policy.refill_rate, time.time(), 1 if consume else 0]
+        )
+        tokens = float(tokens)
+        return bool(allowed), 0 if allowed else (1 - tokens) / policy.refill_rate
+
+
+class RateLimiter:
+    """Rate limiter dengan kebijakan per grup route"""
+
+    def __init__(self, backend, policies: dict):
+        self.backend = backend
+        self.policies = {name: TokenBucketPolicy.parse(spec) for name, spec in policies.items()}
+
+    async def _take(self, policy, key: str, consume: bool):
+        if self.backend.blocking:
+            return await run_in_threadpool(self.backend.take, key, policy, consume)
+        return self.backend.take(key, policy, consume)
+
+    async def check(self, policy_name: str, identity: str, consume: bool = True):
+        """Raise HTTPException 429 jika identity (IP/akun) sudah melewati batas
+
+        Dengan `consume=False` token tidak diambil; pemakaian dicatat terpisah lewat `charge`.
+        """
+        policy = self.policies.get(policy_name)
+        if policy is None:
+            return
+        allowed, retry_after = await self._take(policy, f"{policy_name}:{identity}", consume)
+        if not allowed:
+            metrics.incr(f"ratelimit.{policy_name}.limited")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+    async def charge(self, policy_name: str, identity: str):
+        """Mengambil satu token tanpa menolak request (misalnya setelah login gagal)"""
+        policy = self.policies.get(policy_name)
+        if policy is not None:
+            await self._take(policy, f"{policy_name}:{identity}", True)
+
+
+def get_client_ip(request: Request):
+    """Mengambil IP client, X-Forwarded-For hanya dipakai jika berada di belakang proxy terpercaya"""
+    if RATE_LIMIT_TRUST_PROXY:
+        # Entri paling kiri bisa diisi bebas oleh client, yang dipercaya hanya entri yang ditambahkan proxy kita
+        forwarded_for = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(forwarded_for) >= RATE_LIMIT_PROXY_HOPS:
+            return forwarded_for[-RATE_LIMIT_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(policy_name: str):
+    """Dependency FastAPI untuk membatasi request per IP dengan kebijakan grup tertentu"""
+    async def dependency(request: Request):
+        await limiter.check(policy_name, get_client_ip(request))
+    return dependency
+
+
+# Backend bersama (Redis) dipakai jika dikonfigurasi, selain itu in-memory per worker
+limiter = RateLimiter(
+    RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else InMemoryBackend(),
+    RATE_LIMIT_POLICIES,
+)
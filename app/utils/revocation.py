@@ -0,0 +1,127 @@
+import hashlib
+import threading
+import time
+
+
+class BloomFilter:
+    """Bloom filter berukuran tetap untuk menyimpan jti token yang dicabut secara ringkas"""
+
+    def __init__(self, size_bits: int, hash_count: int):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self._bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: posisi ke-i = h1 + i * h2 (mod m) dari satu digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size_bits for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Daftar token yang dicabut, dikelompokkan per jendela waktu kadaluarsa
+
+    Setiap jendela (bucket) punya Bloom filter sendiri sehingga bucket yang seluruh
+    tokennya sudah kadaluarsa bisa dibuang utuh. Hasil positif dari Bloom filter
+    dikonfirmasi ke tabel revoked_tokens karena bisa saja false positive; hasil konfirmasi
+    (dicabut maupun tidak) disimpan di bucket yang sama dan ikut terbuang bersama bucket-nya,
+    sehingga setiap jti paling banyak satu kali query ke database.
+    """
+
+    def __init__(self, bucket_seconds: int, bucket_capacity: int, hash_count: int):
+        self.bucket_seconds = bucket_seconds
+        self.hash_count = hash_count
+        self.size_bits = bucket_capacity * hash_count * 3 // 2  # ~0.1% false positive untuk k = 10
+        self._buckets = {}  # bucket_id -> (Bloom filter, jti terkonfirmasi dicabut, jti false positive)
+        self._disabled_users = frozenset()
+        self._lock = threading.Lock()
+        self._confirm = None
+        self._sync_thread = None
+        self._stop_event = threading.Event()
+
+    def _bucket_id(self, expires_at: float):
+        return int(expires_at) // self.bucket_seconds
+
+    def add(self, jti: str, expires_at: float):
+        """Menandai jti sebagai dicabut sampai waktu kadaluarsanya"""
+        bucket_id = self._bucket_id(expires_at)
+        with self._lock:
+            bucket = self._buckets.get(bucket_id)
+            if bucket is None:
+                bucket = self._buckets[bucket_id] = (BloomFilter(self.size_bits, self.hash_count), set(), set())
+            bucket[0].add(jti)
+            bucket[2].discard(jti)  # Token yang sebelumnya false positive kini benar-benar dicabut
+
+    def set_disabled_users(self, user_ids):
+        """Mengganti daftar user yang dinonaktifkan (status = 0)"""
+        self._disabled_users = frozenset(str(user_id) for user_id in user_ids)
+
+    def is_revoked(self, jti: str, expires_at: float, user_id: str, confirm: bool = True):
+        """Cek O(1): user dinonaktifkan atau jti ada di Bloom filter bucket kadaluarsanya
+
+        Dengan `confirm=False` hasil positif Bloom filter yang belum dikonfirmasi langsung
+        dianggap dicabut tanpa query database (untuk middleware yang berjalan di event loop).
+        """
+        if user_id in self._disabled_users:
+            return True
+        bucket = self._buckets.get(self._bucket_id(expires_at))
+        if bucket is None:
+            return False
+        bloom, confirmed, cleared = bucket
+        if jti not in bloom or jti in cleared:
+            return False
+        if jti in confirmed or self._confirm is None or not confirm:
+            return True
+        # Kemungkinan false positive: konfirmasi ke database
+        revoked = self._confirm(jti)
+        if revoked is None:
+            return True  # Database gagal, lebih aman menolak token
+        # Hanya jti yang terkena Bloom filter dan dipakai ulang yang tersimpan, bukan semua jti
+        with self._lock:
+            (confirmed if revoked else cleared).add(jti)
+        return revoked
+
+    def prune(self):
+        """Membuang bucket (Bloom filter beserta jti terkonfirmasi) yang seluruh tokennya sudah kadaluarsa"""
+        current_bucket = self._bucket_id(time.time())
+        with self._lock:
+            for bucket_id in [b for b in self._buckets if b < current_bucket]:
+                del self._buckets[bucket_id]
+
+    def start_sync(self, load_revoked, load_disabled_users, confirm, interval: int):
+        """Menjalankan thread sinkronisasi dengan database agar pencabutan dari worker lain ikut terbaca
+
+        `load_revoked(since)` mengembalikan list (jti, expires_at, revoked_at),
+        `load_disabled_users()` mengembalikan list id_user, `confirm(jti)` mengembalikan bool.
+        Semua loader mengembalikan None jika query gagal.
+        """
+        self._confirm = confirm
+
+        def run():
+            since = None
+            while not self._stop_event.is_set():
+                rows = load_revoked(since)
+                if rows is not None:
+                    for jti, expires_at, revoked_at in rows:
+                        self.add(jti, expires_at.timestamp())
+                        since = revoked_at if since is None else max(since, revoked_at)
+                disabled_users = load_disabled_users()
+                if disabled_users is not None:
+                    self.set_disabled_users(disabled_users)
+                self.prune()
+                self._stop_event.wait(interval)
+
+        self._sync_thread = threading.Thread(target=run, name="revocation-sync", daemon=True)
+        self._sync_thread.start()
+
+    def stop_sync(self):
+        self._stop_event.set()
@@ -0,0 +1,87 @@
+import threading
+from functools import wraps
+
+from .metrics import metrics
+from .timeouts import current_guard
+
+
+class _Call:
+    """Satu panggilan yang sedang berjalan beserta hasilnya"""
+    __slots__ = ("event", "result", "error", "timed_out", "cancelled", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.timed_out = False  # Query leader terkena statement timeout
+        self.cancelled = False  # Query leader dibatalkan karena client leader disconnect
+        self.waiters = 0  # Jumlah follower yang menunggu (dibaca QueryGuard.cancel)
+
+
+class SingleFlight:
+    """Menggabungkan panggilan identik yang berjalan bersamaan menjadi satu panggilan ke database"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        name = getattr(fn, "__name__", "call")
+        if not is_leader:
+            # Tunggu hasil dari panggilan yang sedang berjalan (leader)
+            metrics.incr(f"singleflight.coalesced.{name}")
+            call.event.wait()
+            if call.cancelled:
+                # Hasil leader (None) bukan hasil sebenarnya: jalankan ulang untuk client yang masih tersambung
+                metrics.incr(f"singleflight.retried_after_cancel.{name}")
+                return self.do(key, fn, *args, **kwargs)
+            # Event handle_error hanya berjalan di request leader, teruskan status timeout ke follower
+            guard = current_guard.get()
+            if call.timed_out and guard is not None:
+                guard.timed_out = True
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.incr(f"singleflight.calls.{name}")
+        guard = current_guard.get()
+        timed_out_before = guard is not None and guard.timed_out
+        cancelled_before = guard is not None and guard.cancelled
+        if guard is not None:
+            guard.lead(call)
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            if guard is not None:
+                guard.unlead(call)
+                call.timed_out = guard.timed_out and not timed_out_before
+                call.cancelled = guard.cancelled and not cancelled_before
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+
+# Group yang dipakai bersama oleh semua fungsi query baca
+group = SingleFlight()
+
+
+def single_flight(fn):
+    """Decorator untuk fungsi query baca: panggilan dengan argumen sama yang bersamaan hanya menjalankan satu query"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__module__, fn.__qualname__, repr(args), repr(sorted(kwargs.items())))
+        return group.do(key, fn, *args, **kwargs)
+    return wrapper
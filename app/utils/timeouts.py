@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import threading
+from contextvars import ContextVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+
+from .admission import route_group
+from .config import engine, QUERY_TIMEOUT_DEFAULT_MS, QUERY_TIMEOUT_ROUTE_MS
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE Postgres untuk query_canceled (statement_timeout maupun pg_cancel)
+QUERY_CANCELED_SQLSTATE = "57014"
+
+# Path dengan koneksi berumur panjang yang menangani disconnect sendiri
+EXEMPT_PREFIXES = ("/stream", "/ws")
+
+
+class QueryGuard:
+    """Status query milik satu request: timeout, koneksi DBAPI yang sedang dipakai dan hasil pembatalan"""
+
+    def __init__(self, timeout_ms: int):
+        self.timeout_ms = timeout_ms
+        self.timed_out = False
+        self.cancelled = False
+        self._connections = set()
+        self._shared_calls = set()  # Panggilan single-flight yang dipimpin request ini
+        self._lock = threading.Lock()
+
+    def track(self, dbapi_connection):
+        with self._lock:
+            self._connections.add(dbapi_connection)
+
+    def untrack(self, dbapi_connection):
+        with self._lock:
+            self._connections.discard(dbapi_connection)
+
+    def lead(self, call):
+        with self._lock:
+            self._shared_calls.add(call)
+
+    def unlead(self, call):
+        with self._lock:
+            self._shared_calls.discard(call)
+
+    def cancel(self):
+        """Membatalkan query yang sedang berjalan di semua koneksi request ini (client sudah pergi)
+
+        Jika request ini adalah leader single-flight yang sedang ditunggu request lain,
+        query dibiarkan selesai karena hasilnya masih dibutuhkan client yang tersambung.
+        """
+        with self._lock:
+            if any(call.waiters for call in self._shared_calls):
+                metrics.incr("query.cancel_skipped_shared")
+                return
+            self.cancelled = True
+            connections = list(self._connections)
+        for dbapi_connection in connections:
+            try:
+                dbapi_connection.cancel()
+                metrics.incr("query.cancelled_on_disconnect")
+            except Exception as e:
+                logger.warning("Failed to cancel query: %s", e)
+
+
+# Guard untuk request yang sedang diproses, ikut terbawa ke threadpool
+current_guard = ContextVar("query_guard", default=None)
+
+
+# === Event SQLAlchemy === #
+@event.listens_for(engine, "begin")
+def _set_statement_timeout(conn):
+    guard = current_guard.get()
+    if guard is None:
+        return
+    dbapi_connection = conn.connection.dbapi_connection
+    guard.track(dbapi_connection)
+    # SET LOCAL hanya berlaku sampai transaksi ini selesai, koneksi pool lain tidak terpengaruh
+    with dbapi_connection.cursor() as cursor:
+        cursor.execute("SET LOCAL statement_timeout = %s", (guard.timeout_ms,))
+
+@event.listens_for(engine, "checkin")
+def _untrack_connection(dbapi_connection, connection_record):
+    guard = current_guard.get()
+    if guard is not None:
+        guard.untrack(dbapi_connection)
+
+@event.listens_for(engine, "handle_error")
+def _detect_timeout(context):
+    guard = current_guard.get()
+    if guard is None or getattr(context.original_exception, "pgcode", None) != QUERY_CANCELED_SQLSTATE:
+        return
+    if not guard.cancelled:
+        guard.timed_out = True
+        metrics.incr("query.timeout")
+
+
+class QueryTimeoutMiddleware:
+    """Middleware ASGI: statement timeout per grup route, pembatalan query saat client disconnect,
+    dan response 504 jika query melewati batas waktu
+    """
+
+    def __init__(self, app, default_timeout_ms: int = QUERY_TIMEOUT_DEFAULT_MS, route_timeouts: dict = None):
+        self.app = app
+        self.default_timeout_ms = default_timeout_ms
+        self.route_timeouts = QUERY_TIMEOUT_ROUTE_MS if route_timeouts is None else route_timeouts
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        group = route_group(scope["path"])
+        guard = QueryGuard(self.route_timeouts.get(group, self.default_timeout_ms))
+        token = current_guard.set(guard)
+
+        # Pesan dari client dibaca oleh watcher lalu diteruskan ke aplikasi lewat antrean
+        messages = asyncio.Queue()
+        disconnect_message = None
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    await run_in_threadpool(guard.cancel)
+                    return
+
+        async def app_receive():
+            nonlocal disconnect_message
+            if disconnect_message is not None:
+                return disconnect_message
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                disconnect_message = message
+            return message
+
+        response_replaced = False
+
+        async def send_or_gateway_timeout(message):
+            nonlocal response_replaced
+            if response_replaced:
+                return  # Response asli diganti dengan 504
+            # Fungsi query menelan SQLAlchemyError dan mengembalikan None, sehingga route bisa menjawab
+            # 404/400/500: status apa pun diganti 504 jika ada query yang terkena statement timeout
+            if message["type"] == "http.response.start" and guard.timed_out:
+                response_replaced = True
+                body = json.dumps({"detail": "Database query timed out"}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+            await send(message)
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await self.app(scope, app_receive, send_or_gateway_timeout)
+        finally:
+            watcher.cancel()
+            current_guard.reset(token)
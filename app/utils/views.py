@@ -0,0 +1,63 @@
+import logging
+import threading
+from collections import Counter
+
+from .config import VIEW_FLUSH_SECONDS
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Counter view per worker, di-flush berkala ke database dalam satu upsert"""
+
+    def __init__(self, interval: int = VIEW_FLUSH_SECONDS):
+        self.interval = interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flush = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def hit(self, entity: str, entity_id: int):
+        """Menambah satu view (hanya di memori, tanpa query)"""
+        with self._lock:
+            self._counts[(entity, entity_id)] += 1
+
+    def flush(self):
+        """Menulis semua counter tertunda ke database, dikembalikan ke buffer jika gagal"""
+        if self._flush is None:
+            return
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        rows = [(entity, entity_id, views) for (entity, entity_id), views in counts.items()]
+        if self._flush(rows) is None:
+            metrics.incr("views.flush_failed")
+            with self._lock:
+                self._counts.update(counts)  # Dicoba lagi pada flush berikutnya
+            return
+        metrics.incr("views.flushed", sum(counts.values()))
+
+    def start(self, flush):
+        """Menjalankan thread flush berkala; `flush(rows)` mengembalikan None jika gagal"""
+        self._flush = flush
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="view-counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Menghentikan thread dan melakukan flush terakhir"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+
+# Instance counter yang dipakai bersama oleh router detail
+view_counter = ViewCounter()
@@ -0,0 +1,21 @@
+-- Index untuk filter dan sorting endpoint GET /paket
+-- (min_price, max_price, destination_id, sort=price|created_at)
+
+-- GIN index untuk query array containment: destinations @> ARRAY[:destination_id]
+CREATE INDEX IF NOT EXISTS idx_packages_destinations_gin
+    ON packages USING GIN (destinations);
+
+-- Partial index untuk paket aktif, dipakai oleh filter harga dan sorting.
+-- Kolom dan arah index sama persis dengan ORDER BY default di get_all_paket
+-- (price ASC NULLS LAST / created_at DESC NULLS LAST, lalu id_package DESC) agar tidak perlu sort.
+-- Arah kebalikan (order=desc untuk harga, order=asc untuk tanggal) tetap memakai filter, sort dilakukan Postgres.
+DROP INDEX IF EXISTS idx_packages_active_price;
+DROP INDEX IF EXISTS idx_packages_active_created_at;
+
+CREATE INDEX IF NOT EXISTS idx_packages_active_price_id
+    ON packages (price ASC NULLS LAST, id_package DESC)
+    WHERE status = 1;
+
+CREATE INDEX IF NOT EXISTS idx_packages_active_created_at_id
+    ON packages (created_at DESC NULLS LAST, id_package DESC)
+    WHERE status = 1;
@@ -0,0 +1,11 @@
+-- Index untuk endpoint GET /changes (delta sync)
+-- Query memakai updated_at sebagai cursor, termasuk baris yang sudah di-soft delete (status = 0)
+
+CREATE INDEX IF NOT EXISTS idx_destinations_updated_at
+    ON destinations (updated_at, id_destination);
+
+CREATE INDEX IF NOT EXISTS idx_packages_updated_at
+    ON packages (updated_at, id_package);
+
+CREATE INDEX IF NOT EXISTS idx_blogs_updated_at
+    ON blogs (updated_at, id_blog);
@@ -0,0 +1,16 @@
+-- Tabel token yang dicabut (logout), dibaca oleh semua worker untuk membangun denylist in-memory
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti         VARCHAR(64) PRIMARY KEY,
+    id_user     INTEGER NOT NULL,
+    expires_at  TIMESTAMPTZ NOT NULL,
+    revoked_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Sinkronisasi inkremental antar worker berdasarkan revoked_at
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at
+    ON revoked_tokens (revoked_at);
+
+-- Pembersihan token yang sudah kadaluarsa
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at
+    ON revoked_tokens (expires_at);
@@ -0,0 +1,29 @@
+-- Koordinat destinasi untuk pencarian terdekat (GET /destinasi/nearby)
+
+ALTER TABLE destinations ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE destinations ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+
+-- Backfill dari location_url yang memuat koordinat
+-- (sama dengan parse_coordinates di app/queries/q_destinasi.py)
+UPDATE destinations d
+SET latitude = c.coords[1]::DOUBLE PRECISION,
+    longitude = c.coords[2]::DOUBLE PRECISION
+FROM (
+    SELECT id_destination,
+           COALESCE(
+               regexp_match(location_url, '!3d(-?\d{1,2}(?:\.\d+)?)!4d(-?\d{1,3}(?:\.\d+)?)'),
+               regexp_match(location_url, '(?:@|[?&](?:q|ll|query|destination|center)=)(-?\d{1,2}(?:\.\d+)?)(?:,|%2C)\s*(-?\d{1,3}(?:\.\d+)?)')
+           ) AS coords
+    FROM destinations
+    WHERE location_url IS NOT NULL
+) c
+WHERE d.id_destination = c.id_destination
+  AND d.latitude IS NULL
+  AND c.coords IS NOT NULL
+  AND c.coords[1]::DOUBLE PRECISION BETWEEN -90 AND 90
+  AND c.coords[2]::DOUBLE PRECISION BETWEEN -180 AND 180;
+
+-- GiST index untuk filter bounding box: point(longitude, latitude) <@ box(...)
+CREATE INDEX IF NOT EXISTS idx_destinations_active_point
+    ON destinations USING GIST (point(longitude, latitude))
+    WHERE status = 1 AND latitude IS NOT NULL AND longitude IS NOT NULL;
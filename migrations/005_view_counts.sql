@@ -0,0 +1,14 @@
+-- Jumlah view harian per item, diisi oleh flush berkala counter in-memory tiap worker
+
+CREATE TABLE IF NOT EXISTS view_counts (
+    entity     VARCHAR(16) NOT NULL,  -- destinasi | paket | blog
+    entity_id  INTEGER NOT NULL,
+    day        DATE NOT NULL,
+    views      BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity, entity_id, day)
+);
+
+-- Agregasi ranking per entity dalam rentang hari (GET /popular)
+CREATE INDEX IF NOT EXISTS idx_view_counts_entity_day
+    ON view_counts (entity, day)
+    INCLUDE (entity_id, views);